@@ -84,6 +84,7 @@ class IconoglottClient {
   connect() {
     const proto = location.protocol === "https:" ? "wss:" : "ws:";
     this.ws = new WebSocket(`${proto}//${location.host}/ws`);
+    this.ws.binaryType = "arraybuffer";
     this.ws.onopen = () => {
       this.status.classList.add("connected");
       if (this.editor.value) this.send(this.editor.value);
@@ -218,7 +219,7 @@ class IconoglottClient {
   }
   onMessage(e) {
     try {
-      const msg = JSON.parse(e.data);
+      const msg = JSON.parse(typeof e.data === "string" ? e.data : new TextDecoder().decode(e.data));
       if (msg.type === "render" && msg.svg) {
         this.canvas.innerHTML = msg.svg;
       }
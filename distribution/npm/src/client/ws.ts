@@ -67,9 +67,12 @@ export function createClient(options: IconoglottClientOptions): IconoglottClient
   let shouldReconnect = reconnect;
   let debounceTimer: ReturnType<typeof setTimeout> | null = null;
   let pendingSource: string | null = null;
+  const decoder = new TextDecoder();
 
   const connect = () => {
     ws = new WebSocket(url);
+    // Server sends orjson-encoded binary frames
+    ws.binaryType = 'arraybuffer';
 
     ws.onopen = () => {
       onConnectionChange?.(true);
@@ -91,7 +94,8 @@ export function createClient(options: IconoglottClientOptions): IconoglottClient
 
     ws.onmessage = (e) => {
       try {
-        const msg: ServerMessage = JSON.parse(e.data);
+        const text = typeof e.data === 'string' ? e.data : decoder.decode(e.data);
+        const msg: ServerMessage = JSON.parse(text);
         
         if (msg.type === 'render') {
           const { svg, errors } = msg as RenderResponse;
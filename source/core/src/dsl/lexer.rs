@@ -131,14 +131,17 @@ impl Default for TokenValue {
 }
 
 /// A single token from the lexer
+///
+/// Positions are stored as `u32` (not `usize`) to keep tokens compact: the
+/// token stream is the parser's hottest array and this trims 8 bytes per token.
 #[derive(Clone, Debug, PartialEq, Serialize, Deserialize, TS)]
 #[ts(export)]
 #[cfg_attr(feature = "python", pyclass)]
 pub struct Token {
     pub ttype: TokenType,
     pub value: TokenValue,
-    pub line: usize,
-    pub col: usize,
+    pub line: u32,
+    pub col: u32,
 }
 
 #[cfg(feature = "python")]
@@ -148,10 +151,10 @@ impl Token {
     fn get_ttype(&self) -> TokenType { self.ttype }
 
     #[getter]
-    fn get_line(&self) -> usize { self.line }
+    fn get_line(&self) -> usize { self.line as usize }
 
     #[getter]
-    fn get_col(&self) -> usize { self.col }
+    fn get_col(&self) -> usize { self.col as usize }
 
     #[getter]
     fn value_str(&self) -> Option<String> {
@@ -195,7 +198,8 @@ impl Token {
 
 impl Token {
     pub fn new(ttype: TokenType, value: TokenValue, line: usize, col: usize) -> Self {
-        Self { ttype, value, line, col }
+        let clamp = |n: usize| u32::try_from(n).unwrap_or(u32::MAX);
+        Self { ttype, value, line: clamp(line), col: clamp(col) }
     }
 }
 
@@ -203,35 +207,55 @@ impl Token {
 struct Pattern {
     regex: Regex,
     ttype: Option<TokenType>,
+    /// Bytes a match can start with (used to build `FIRST_BYTE`)
+    first: fn(u8) -> bool,
 }
 
+fn is_num_start(b: u8) -> bool { b == b'-' || b.is_ascii_digit() }
+fn is_size_start(b: u8) -> bool { matches!(b, b'g' | b'h' | b'l' | b'm' | b'n' | b's' | b't' | b'x') }
+fn is_ident_start(b: u8) -> bool { b == b'_' || b.is_ascii_alphabetic() }
+
 lazy_static! {
     /// Cached lexer patterns - built once, reused across all Lexer instances
     static ref PATTERNS: Vec<Pattern> = vec![
-        Pattern { regex: Regex::new(r"^//[^\n]*").unwrap(), ttype: None }, // Comments
+        Pattern { regex: Regex::new(r"^//[^\n]*").unwrap(), ttype: None, first: |b| b == b'/' }, // Comments
         // Animation: @keyframes directive
-        Pattern { regex: Regex::new(r"^@keyframes\b").unwrap(), ttype: Some(TokenType::AtKeyframes) },
-        Pattern { regex: Regex::new(r"^\$[a-zA-Z_][a-zA-Z0-9_]*").unwrap(), ttype: Some(TokenType::Var) },
-        Pattern { regex: Regex::new(r"^#[0-9a-fA-F]{3,8}\b").unwrap(), ttype: Some(TokenType::Color) },
+        Pattern { regex: Regex::new(r"^@keyframes\b").unwrap(), ttype: Some(TokenType::AtKeyframes), first: |b| b == b'@' },
+        Pattern { regex: Regex::new(r"^\$[a-zA-Z_][a-zA-Z0-9_]*").unwrap(), ttype: Some(TokenType::Var), first: |b| b == b'$' },
+        Pattern { regex: Regex::new(r"^#[0-9a-fA-F]{3,8}\b").unwrap(), ttype: Some(TokenType::Color), first: |b| b == b'#' },
         // Percent pairs must come before regular pairs (50%,50% or 50%x50%)
-        Pattern { regex: Regex::new(r"^-?\d+\.?\d*%[,x]-?\d+\.?\d*%").unwrap(), ttype: Some(TokenType::PercentPair) },
-        Pattern { regex: Regex::new(r"^-?\d+\.?\d*[,x]-?\d+\.?\d*").unwrap(), ttype: Some(TokenType::Pair) },
+        Pattern { regex: Regex::new(r"^-?\d+\.?\d*%[,x]-?\d+\.?\d*%").unwrap(), ttype: Some(TokenType::PercentPair), first: is_num_start },
+        Pattern { regex: Regex::new(r"^-?\d+\.?\d*[,x]-?\d+\.?\d*").unwrap(), ttype: Some(TokenType::Pair), first: is_num_start },
         // Single percentage (50%)
-        Pattern { regex: Regex::new(r"^-?\d+\.?\d*%").unwrap(), ttype: Some(TokenType::Percent) },
-        Pattern { regex: Regex::new(r#"^"[^"]*""#).unwrap(), ttype: Some(TokenType::String) },
-        Pattern { regex: Regex::new(r"^'[^']*'").unwrap(), ttype: Some(TokenType::String) },
+        Pattern { regex: Regex::new(r"^-?\d+\.?\d*%").unwrap(), ttype: Some(TokenType::Percent), first: is_num_start },
+        Pattern { regex: Regex::new(r#"^"[^"]*""#).unwrap(), ttype: Some(TokenType::String), first: |b| b == b'"' },
+        Pattern { regex: Regex::new(r"^'[^']*'").unwrap(), ttype: Some(TokenType::String), first: |b| b == b'\'' },
         // Duration values (500ms, 1s, 2.5s) - must come before plain numbers
-        Pattern { regex: Regex::new(r"^-?\d+\.?\d*(ms|s)\b").unwrap(), ttype: Some(TokenType::Duration) },
-        Pattern { regex: Regex::new(r"^-?\d+\.?\d*").unwrap(), ttype: Some(TokenType::Number) },
-        Pattern { regex: Regex::new(r"^\[").unwrap(), ttype: Some(TokenType::LBracket) },
-        Pattern { regex: Regex::new(r"^\]").unwrap(), ttype: Some(TokenType::RBracket) },
-        Pattern { regex: Regex::new(r"^->").unwrap(), ttype: Some(TokenType::Arrow) },
-        Pattern { regex: Regex::new(r"^:").unwrap(), ttype: Some(TokenType::Colon) },
-        Pattern { regex: Regex::new(r"^=").unwrap(), ttype: Some(TokenType::Equals) },
+        Pattern { regex: Regex::new(r"^-?\d+\.?\d*(ms|s)\b").unwrap(), ttype: Some(TokenType::Duration), first: is_num_start },
+        Pattern { regex: Regex::new(r"^-?\d+\.?\d*").unwrap(), ttype: Some(TokenType::Number), first: is_num_start },
+        Pattern { regex: Regex::new(r"^\[").unwrap(), ttype: Some(TokenType::LBracket), first: |b| b == b'[' },
+        Pattern { regex: Regex::new(r"^\]").unwrap(), ttype: Some(TokenType::RBracket), first: |b| b == b']' },
+        Pattern { regex: Regex::new(r"^->").unwrap(), ttype: Some(TokenType::Arrow), first: |b| b == b'-' },
+        Pattern { regex: Regex::new(r"^:").unwrap(), ttype: Some(TokenType::Colon), first: |b| b == b':' },
+        Pattern { regex: Regex::new(r"^=").unwrap(), ttype: Some(TokenType::Equals), first: |b| b == b'=' },
         // Size keywords before general identifiers
-        Pattern { regex: Regex::new(r"^(nano|micro|tiny|small|medium|large|xlarge|xl|huge|massive|giant)\b").unwrap(), ttype: Some(TokenType::Size) },
-        Pattern { regex: Regex::new(r"^[a-zA-Z_][a-zA-Z0-9_-]*").unwrap(), ttype: Some(TokenType::Ident) },
+        Pattern { regex: Regex::new(r"^(nano|micro|tiny|small|medium|large|xlarge|xl|huge|massive|giant)\b").unwrap(), ttype: Some(TokenType::Size), first: is_size_start },
+        Pattern { regex: Regex::new(r"^[a-zA-Z_][a-zA-Z0-9_-]*").unwrap(), ttype: Some(TokenType::Ident), first: is_ident_start },
     ];
+
+    /// Bitmask of candidate `PATTERNS` indices per leading byte. Only candidates are
+    /// tried (still in priority order), so e.g. an identifier skips the eleven
+    /// symbol/number regexes ahead of it.
+    static ref FIRST_BYTE: [u32; 256] = {
+        assert!(PATTERNS.len() <= 32, "FIRST_BYTE masks hold at most 32 patterns");
+        let mut table = [0u32; 256];
+        for (i, pattern) in PATTERNS.iter().enumerate() {
+            for b in 0..=255u8 {
+                if (pattern.first)(b) { table[b as usize] |= 1 << i; }
+            }
+        }
+        table
+    };
 }
 
 /// Lexer for tokenizing DSL source
@@ -254,13 +278,13 @@ impl Lexer {
 
     /// Tokenize the source and return all tokens
     pub fn tokenize(&mut self) -> Vec<Token> {
+        // Every token lands directly in this one vector (no per-line buffers)
         let mut tokens = Vec::new();
         let num_lines = self.lines.len();
 
         for lineno in 0..num_lines {
             self.line_idx = lineno;
-            // Clone the line to avoid borrowing self.lines while mutating self
-            let line = self.lines[lineno].clone();
+            let line = self.lines[lineno].as_str();
             let stripped = line.trim_start();
 
             // Skip empty and comment-only lines
@@ -269,10 +293,9 @@ impl Lexer {
             }
 
             let indent = line.len() - stripped.len();
-            let line_len = line.len();
-            tokens.extend(self.handle_indent(indent, lineno));
-            tokens.extend(self.tokenize_line(stripped, lineno));
-            tokens.push(Token::new(TokenType::Newline, TokenValue::Str("\n".into()), lineno, line_len));
+            Self::handle_indent(&mut self.indent_stack, indent, lineno, &mut tokens);
+            Self::tokenize_line(stripped, lineno, &mut tokens);
+            tokens.push(Token::new(TokenType::Newline, TokenValue::Str("\n".into()), lineno, line.len()));
         }
 
         // Close remaining indents
@@ -285,37 +308,38 @@ impl Lexer {
         tokens
     }
 
-    fn handle_indent(&mut self, indent: usize, line: usize) -> Vec<Token> {
-        let mut tokens = Vec::new();
-        let current = *self.indent_stack.last().unwrap_or(&0);
+    fn handle_indent(indent_stack: &mut Vec<usize>, indent: usize, line: usize, tokens: &mut Vec<Token>) {
+        let current = *indent_stack.last().unwrap_or(&0);
 
         if indent > current {
-            self.indent_stack.push(indent);
+            indent_stack.push(indent);
             tokens.push(Token::new(TokenType::Indent, TokenValue::None, line, 0));
         } else {
-            while indent < *self.indent_stack.last().unwrap_or(&0) {
-                self.indent_stack.pop();
+            while indent < *indent_stack.last().unwrap_or(&0) {
+                indent_stack.pop();
                 tokens.push(Token::new(TokenType::Dedent, TokenValue::None, line, 0));
             }
         }
-        tokens
     }
 
-    fn tokenize_line(&self, line: &str, lineno: usize) -> Vec<Token> {
-        let mut tokens = Vec::new();
+    fn tokenize_line(line: &str, lineno: usize, tokens: &mut Vec<Token>) {
+        let bytes = line.as_bytes();
         let mut pos = 0;
 
-        while pos < line.len() {
-            let remaining = &line[pos..];
-
-            // Skip whitespace
-            if remaining.starts_with(char::is_whitespace) {
+        while pos < bytes.len() {
+            // Byte compares for the ASCII whitespace and punctuation the DSL is made of
+            let b = bytes[pos];
+            if b.is_ascii_whitespace() {
                 pos += 1;
                 continue;
             }
 
+            let remaining = &line[pos..];
             let mut matched = false;
-            for pattern in PATTERNS.iter() {
+            let mut candidates = FIRST_BYTE[b as usize];
+            while candidates != 0 {
+                let pattern = &PATTERNS[candidates.trailing_zeros() as usize];
+                candidates &= candidates - 1;
                 if let Some(m) = pattern.regex.find(remaining) {
                     if let Some(ttype) = pattern.ttype {
                         let raw = m.as_str();
@@ -329,10 +353,10 @@ impl Lexer {
             }
 
             if !matched {
-                pos += 1; // Skip unknown character
+                // Skip the whole unknown character so `pos` stays on a UTF-8 boundary
+                pos += remaining.chars().next().map_or(1, char::len_utf8);
             }
         }
-        tokens
     }
 
     fn parse_value(raw: &str, ttype: TokenType) -> TokenValue {
@@ -521,6 +545,32 @@ mod tests {
         assert!(tokens.iter().any(|t| t.ttype == TokenType::Duration && matches!(&t.value, TokenValue::Num(n) if (*n - 2000.0).abs() < 0.001)));
     }
 
+    #[test]
+    fn test_first_byte_table_covers_matches() {
+        // Any pattern that matches at a byte must be a candidate for that byte
+        let tails = ["", "1", "5.5", "a", "ff", "_x", "keyframes", "ano", "l", "0%", "%,1%", ",2", "x3", "ms", "s", ">", "\"", "'"];
+        for b in 0..128u8 {
+            for tail in tails {
+                let input = format!("{}{}", b as char, tail);
+                for (i, pattern) in PATTERNS.iter().enumerate() {
+                    if pattern.regex.is_match(&input) {
+                        assert!(FIRST_BYTE[b as usize] & (1 << i) != 0, "pattern {} missing for {:?}", i, input);
+                    }
+                }
+            }
+        }
+    }
+
+    #[test]
+    fn test_lexer_skips_non_ascii() {
+        // Unknown multi-byte characters are skipped whole; strings keep theirs
+        let mut lexer = Lexer::new("rect \u{a0}é 10x20 \"café\" → #fff");
+        let tokens = lexer.tokenize();
+        assert!(tokens.iter().any(|t| t.ttype == TokenType::Pair));
+        assert!(tokens.iter().any(|t| matches!(&t.value, TokenValue::Str(s) if s == "café")));
+        assert!(tokens.iter().any(|t| t.ttype == TokenType::Color));
+    }
+
     #[test]
     fn test_lexer_duration_fractional() {
         let mut lexer = Lexer::new("delay 0.5s");
@@ -20,11 +20,14 @@ pub const STMT_STARTERS: &[TokenType] = &[TokenType::Ident, TokenType::Var];
 // Parser Constants
 // ─────────────────────────────────────────────────────────────────────────────
 
+/// Shape keywords. A static `match` compiles to length + byte comparisons,
+/// avoiding a SipHash per statement on the parser's hottest dispatch.
+#[inline]
+pub(crate) fn is_shape(s: &str) -> bool {
+    matches!(s, "rect" | "circle" | "ellipse" | "line" | "path" | "polygon" | "text" | "image" | "arc" | "curve" | "diamond")
+}
+
 lazy_static::lazy_static! {
-    pub(crate) static ref SHAPES: HashSet<&'static str> = {
-        ["rect", "circle", "ellipse", "line", "path", "polygon", "text", "image", "arc", "curve", "diamond"]
-            .into_iter().collect()
-    };
     pub(crate) static ref STYLE_PROPS: HashSet<&'static str> = {
         ["fill", "stroke", "opacity", "corner", "shadow", "gradient", "blur", "animate", "transition"]
             .into_iter().collect()
@@ -94,6 +97,8 @@ pub struct Parser {
     indent_depth: usize,
     /// Panic mode flag - true when recovering from error
     panic_mode: bool,
+    /// Matching Dedent position for each Indent position (built on first recovery)
+    indent_pairs: Option<HashMap<usize, usize>>,
 }
 
 impl Parser {
@@ -105,7 +110,26 @@ impl Parser {
             errors: Vec::new(),
             indent_depth: 0,
             panic_mode: false,
+            indent_pairs: None,
+        }
+    }
+
+    /// Map each Indent to its matching Dedent in a single stack walk
+    fn pair_indents(tokens: &[Token]) -> HashMap<usize, usize> {
+        let mut pairs = HashMap::new();
+        let mut stack = Vec::new();
+        for (i, tok) in tokens.iter().enumerate() {
+            match tok.ttype {
+                TokenType::Indent => stack.push(i),
+                TokenType::Dedent => {
+                    if let Some(open) = stack.pop() {
+                        pairs.insert(open, i);
+                    }
+                }
+                _ => {}
+            }
         }
+        pairs
     }
 
     pub(crate) fn current(&self) -> Option<&Token> {
@@ -138,9 +162,12 @@ impl Parser {
         self.current().map(|t| types.contains(&t.ttype)).unwrap_or(false)
     }
 
+    /// Skip newline tokens. Newlines never touch indent depth, so this bumps the
+    /// cursor directly; the common zero-newline case is a single comparison.
+    #[inline]
     pub(crate) fn skip_newlines(&mut self) {
-        while self.matches(&[TokenType::Newline]) {
-            self.advance();
+        while matches!(self.tokens.get(self.pos), Some(t) if t.ttype == TokenType::Newline) {
+            self.pos += 1;
         }
     }
 
@@ -165,7 +192,7 @@ impl Parser {
     pub(crate) fn var_ref(&self, tok: &Token) -> PropValue {
         if let TokenValue::Str(name) = &tok.value {
             let name = name.strip_prefix('$').unwrap_or(name);
-            PropValue::VarRef(name.to_string(), tok.line, tok.col)
+            PropValue::VarRef(name.to_string(), tok.line as usize, tok.col as usize)
         } else {
             PropValue::None
         }
@@ -185,7 +212,7 @@ impl Parser {
     fn error_at_current(&mut self, msg: &str, kind: ErrorKind, suggestion: Option<&str>) {
         if self.panic_mode { return; } // Suppress cascade errors
         
-        let (line, col) = self.current().map(|t| (t.line, t.col)).unwrap_or((0, 0));
+        let (line, col) = self.current().map(|t| (t.line as usize, t.col as usize)).unwrap_or((0, 0));
         let mut err = ParseError::new(msg, kind, line, col);
         if let Some(s) = suggestion { err = err.with_suggestion(s); }
         self.errors.push(err);
@@ -239,6 +266,20 @@ impl Parser {
         }
     }
 
+    /// Skip an indented block that follows the current line in one jump.
+    /// Used after a malformed statement so its body doesn't cascade errors.
+    fn skip_trailing_block(&mut self) {
+        if !self.matches(&[TokenType::Newline]) { return; }
+        let open = self.pos + 1;
+        if self.tokens.get(open).map(|t| t.ttype) != Some(TokenType::Indent) { return; }
+        let tokens = &self.tokens;
+        let pairs = self.indent_pairs.get_or_insert_with(|| Self::pair_indents(tokens));
+        if let Some(&close) = pairs.get(&open) {
+            // Balanced Indent/Dedent pair, so indent_depth is unchanged
+            self.pos = close + 1;
+        }
+    }
+
     /// Synchronize to end of current line
     fn sync_to_line_end(&mut self) {
         while let Some(tok) = self.current() {
@@ -324,7 +365,7 @@ impl Parser {
             "edge" => Some(AstNode::Shape(self.parse_edge_as_shape())),
             "symbol" => Some(self.parse_symbol()),
             "use" => Some(self.parse_use()),
-            _ if SHAPES.contains(cmd.as_str()) => Some(self.parse_shape(&cmd)),
+            _ if is_shape(&cmd) => Some(self.parse_shape(&cmd)),
             _ => {
                 // Unknown command - suggest similar valid commands
                 let suggestion = Self::suggest_command(&cmd);
@@ -334,6 +375,7 @@ impl Parser {
                     suggestion.as_deref()
                 );
                 self.sync_to_line_end();
+                self.skip_trailing_block();
                 None
             }
         }
@@ -421,7 +463,17 @@ impl Parser {
             );
         }
 
-        // Parse canvas properties with recovery
+        // Fast path: nearly every canvas carries at most a single `fill`
+        let is_fill = matches!(
+            self.current(),
+            Some(Token { ttype: TokenType::Ident, value: TokenValue::Str(s), .. }) if s == "fill"
+        );
+        if is_fill {
+            self.advance();
+            self.parse_canvas_fill(&mut canvas);
+        }
+
+        // Remaining canvas properties (rare) with recovery
         while self.matches(&[TokenType::Ident, TokenType::Size]) {
             let prop = self.current().and_then(|t| match &t.value {
                 TokenValue::Str(s) => Some(s.clone()),
@@ -430,22 +482,7 @@ impl Parser {
             self.advance();
 
             match prop.as_deref() {
-                Some("fill") => {
-                    if self.matches(&[TokenType::Color, TokenType::Var, TokenType::Ident]) {
-                        if let Some(tok) = self.current() {
-                            if let TokenValue::Str(s) = self.resolve(tok) {
-                                canvas.fill = s;
-                            }
-                            self.advance();
-                        }
-                    } else {
-                        self.error_at_current(
-                            "Expected color value after 'fill'",
-                            ErrorKind::InvalidValue,
-                            Some("Use a hex color like #fff or #1a2b3c")
-                        );
-                    }
-                }
+                Some("fill") => self.parse_canvas_fill(&mut canvas),
                 Some(p) => {
                     self.error_at_current(
                         &format!("Unknown canvas property '{}'", p),
@@ -461,6 +498,24 @@ impl Parser {
         AstNode::Canvas(canvas)
     }
 
+    /// Parse the color value following a canvas `fill` keyword
+    fn parse_canvas_fill(&mut self, canvas: &mut AstCanvas) {
+        if self.matches(&[TokenType::Color, TokenType::Var, TokenType::Ident]) {
+            if let Some(tok) = self.current() {
+                if let TokenValue::Str(s) = self.resolve(tok) {
+                    canvas.fill = s;
+                }
+                self.advance();
+            }
+        } else {
+            self.error_at_current(
+                "Expected color value after 'fill'",
+                ErrorKind::InvalidValue,
+                Some("Use a hex color like #fff or #1a2b3c")
+            );
+        }
+    }
+
     fn parse_group(&mut self) -> AstNode {
         let mut shape = AstShape::new("group");
 
@@ -749,7 +804,7 @@ impl Parser {
                     };
 
                     // Check for nested shapes
-                    if SHAPES.contains(prop.as_str()) || prop == "stack" || prop == "row" {
+                    if is_shape(&prop) || prop == "stack" || prop == "row" {
                         match self.parse_statement() {
                             Some(AstNode::Shape(mut child)) => {
                                 // Check for child layout constraints
@@ -1346,7 +1401,7 @@ impl Parser {
                         _ => { self.advance(); continue; }
                     };
 
-                    if SHAPES.contains(cmd.as_str()) || cmd == "group" {
+                    if is_shape(&cmd) || cmd == "group" {
                         match self.parse_statement() {
                             Some(AstNode::Shape(child)) => symbol.children.push(child),
                             _ => {}
@@ -1652,7 +1707,7 @@ impl Parser {
                         _ => { self.advance(); continue; }
                     };
 
-                    if SHAPES.contains(prop.as_str()) {
+                    if is_shape(&prop) {
                         match self.parse_statement() {
                             Some(AstNode::Shape(child)) => shape.children.push(child),
                             _ => {} // Error already recorded, continue with next
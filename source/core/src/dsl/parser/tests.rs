@@ -63,6 +63,19 @@ fn test_canvas_sizes() {
     }
 }
 
+#[test]
+fn test_canvas_fill_then_unknown_property() {
+    let (ast, errors) = parse_with_errors("canvas large fill #123 border 2");
+    if let AstNode::Scene(children) = ast {
+        if let AstNode::Canvas(c) = &children[0] {
+            assert_eq!(c.fill, "#123");
+        } else {
+            panic!("Expected Canvas");
+        }
+    }
+    assert!(errors.iter().any(|e| e.kind == ErrorKind::InvalidProperty));
+}
+
 #[test]
 fn test_rect() {
     let ast = parse_source("rect at 100,200 size 50x30 #ff0");
@@ -187,6 +200,20 @@ fn test_error_recovery_multiple_errors() {
     }
 }
 
+#[test]
+fn test_error_recovery_skips_unknown_command_block() {
+    let (ast, errors) = parse_with_errors("foobar\n  fill #f00\n    nested 1\n  stroke #000\nrect at 100,100");
+
+    // The unknown command's body is skipped instead of reporting each line
+    assert_eq!(errors.len(), 1);
+    assert_eq!(errors[0].kind, ErrorKind::UnknownCommand);
+
+    if let AstNode::Scene(children) = ast {
+        assert_eq!(children.len(), 1);
+        assert!(matches!(&children[0], AstNode::Shape(s) if s.kind == "rect"));
+    }
+}
+
 #[test]
 fn test_error_recovery_invalid_canvas_size() {
     let (ast, errors) = parse_with_errors("canvas invalidsize\nrect at 50,50");
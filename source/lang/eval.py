@@ -1,8 +1,10 @@
 """Interpreter for the visual DSL using Rust core for lexing, parsing, and rendering."""
 
 import logging
+from copy import deepcopy
 from dataclasses import dataclass, field
-from .types import Node, Canvas, Shape, Style, Transform, CANVAS_SIZES
+from functools import lru_cache
+from .types import Node, Canvas, Shape, Style, Transform, CANVAS_SIZES, intern
 from .errors import ErrorCode, ErrorInfo, ErrorList, RenderError
 
 logger = logging.getLogger(__name__)
@@ -22,6 +24,11 @@ for attr in ['Lexer', 'Parser', 'Scene']:
         raise ImportError(f"Rust core module is incomplete - missing {attr} class")
 
 
+def _escape_xml(text: str) -> str:
+    """Escape text for use as SVG character data."""
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
 @dataclass(slots=True)
 class SceneState:
     """Evaluated scene state."""
@@ -32,6 +39,7 @@ class SceneState:
     _def_id: int = 0
     _gradients: list[tuple[str, dict]] = field(default_factory=list)
     _filters: list[tuple[str, dict]] = field(default_factory=list)
+    _styles: dict[tuple, 'rust.Style'] = field(default_factory=dict)  # Per-render rust.Style flyweights
 
     def next_id(self) -> str:
         self._def_id += 1
@@ -43,6 +51,11 @@ class SceneState:
 
     def to_svg(self) -> str:
         """Render scene to SVG using Rust core."""
+        # Defs and styles are rebuilt per render so re-rendering never duplicates or leaks them
+        self._def_id = 0
+        self._gradients.clear()
+        self._filters.clear()
+        self._styles.clear()
         try:
             # Get CanvasSize enum from Rust
             size = getattr(rust.CanvasSize, self.canvas.size.capitalize(), None)
@@ -77,7 +90,7 @@ class SceneState:
 
     def _error_svg(self, msg: str) -> str:
         """Return an error SVG when rendering fails."""
-        escaped = msg.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+        escaped = _escape_xml(msg)
         return (
             f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.canvas.width}" '
             f'height="{self.canvas.height}"><rect width="100%" height="100%" fill="#1a1a2e"/>'
@@ -160,29 +173,38 @@ class SceneState:
             fid = self.next_id()
             self._filters.append((fid, {'kind': 'shadow', **shadow}))
         
-        return rust.Style(
-            fill=fill,
-            stroke=stroke,
-            stroke_width=float(style.get('stroke_width', 1.0)),
-            opacity=float(style.get('opacity', 1.0)),
-            corner=float(style.get('corner', 0.0))
-        )
+        # Flyweight: scenes repeat a handful of styles, and Rust shapes clone the Style
+        key = (fill, stroke, style.get('stroke_width', 1.0), style.get('opacity', 1.0), style.get('corner', 0.0))
+        rust_style = self._styles.get(key)
+        if rust_style is None:
+            rust_style = self._styles[key] = rust.Style(
+                fill=fill,
+                stroke=stroke,
+                stroke_width=float(key[2]),
+                opacity=float(key[3]),
+                corner=float(key[4])
+            )
+        return rust_style
 
     def _make_transform(self, transform: dict) -> str | None:
         """Convert transform dict to SVG transform string."""
         if not transform:
             return None
+        translate, rotate, scale = transform.get('translate'), transform.get('rotate'), transform.get('scale')
+        # Identity transform (the common case): skip string building entirely
+        if not (translate or rotate or scale):
+            return None
         parts = []
-        if translate := transform.get('translate'):
+        if translate:
             tx, ty = (translate, 0) if isinstance(translate, (int, float)) else translate
             parts.append(f"translate({tx} {ty})")
-        if (rotate := transform.get('rotate')) and rotate != 0:
+        if rotate:
             if origin := transform.get('origin'):
                 ox, oy = origin
                 parts.append(f"rotate({rotate} {ox} {oy})")
             else:
                 parts.append(f"rotate({rotate})")
-        if scale := transform.get('scale'):
+        if scale:
             sx, sy = (scale, scale) if isinstance(scale, (int, float)) else scale
             parts.append(f"scale({sx} {sy})")
         return ' '.join(parts) if parts else None
@@ -289,7 +311,8 @@ class SceneState:
         else:  # straight
             return f"M{x1},{y1} L{x2},{y2}"
 
-    def _measure_width(self, s: dict) -> float:
+    @staticmethod
+    def _measure_width(s: dict) -> float:
         """Measure shape width for layout."""
         props = s['props']
         kind = s['kind']
@@ -304,10 +327,11 @@ class SceneState:
             size = float(s['style'].get('font_size', 16))
             return len(str(content)) * size * 0.6
         if kind == 'layout':
-            return sum(self._measure_width(c) + float(props.get('gap', 0)) for c in s.get('children', []))
+            return sum(SceneState._measure_width(c) + float(props.get('gap', 0)) for c in s.get('children', []))
         return 40.0
 
-    def _measure_height(self, s: dict) -> float:
+    @staticmethod
+    def _measure_height(s: dict) -> float:
         """Measure shape height for layout."""
         props = s['props']
         kind = s['kind']
@@ -322,11 +346,23 @@ class SceneState:
         if kind == 'layout':
             gap = float(props.get('gap', 0))
             if props.get('direction') == 'vertical':
-                return sum(self._measure_height(c) + gap for c in s.get('children', []))
-            return max((self._measure_height(c) for c in s.get('children', [])), default=0.0)
+                return sum(SceneState._measure_height(c) + gap for c in s.get('children', []))
+            return max((SceneState._measure_height(c) for c in s.get('children', [])), default=0.0)
         return 40.0
 
 
+@lru_cache(maxsize=4096)
+def _parse(source: str) -> tuple[dict, tuple]:
+    """Lex and parse source with the Rust core, memoized on the source string.
+
+    Returns (ast, errors) where errors are (message, line, col) tuples. The AST is
+    shared between calls: treat it as read-only (_shape_to_dict copies what it hands out).
+    """
+    parser = rust.Parser(rust.Lexer(source).py_tokenize())
+    ast = parser.parse_py()
+    return ast, tuple((err.message, err.line, err.col) for err in parser.get_errors())
+
+
 class Interpreter:
     """Evaluate DSL AST into renderable state using Rust core."""
 
@@ -336,32 +372,27 @@ class Interpreter:
     def eval(self, source: str) -> SceneState:
         """Interpret source code using Rust lexer/parser and return scene state."""
         self.state = SceneState()
-        
-        # Tokenize with Rust lexer
-        lexer = rust.Lexer(source)
-        tokens = lexer.py_tokenize()
-        
-        # Parse with Rust parser - returns native Python objects directly
-        parser = rust.Parser(tokens)
-        ast = parser.parse_py()
+        self._eval_source(source)
+        return self.state
+
+    def _eval_source(self, source: str):
+        """Parse and evaluate source into the current state."""
+        # Tokenize and parse with Rust core (cached: editors and tests resend identical source)
+        ast, errors = _parse(source)
         
         # Collect parse errors
-        for err in parser.get_errors():
-            self.state.add_error(
-                ErrorCode.PARSE_UNEXPECTED_TOKEN,
-                err.message,
-                err.line,
-                err.col
-            )
+        for message, line, col in errors:
+            self.state.add_error(ErrorCode.PARSE_UNEXPECTED_TOKEN, message, line, col)
         
-        # Evaluate the AST
+        self._eval_tree(ast)
+
+    def _eval_tree(self, ast: dict):
+        """Evaluate a parsed AST into the current state, recording failures as errors."""
         try:
             self._eval_ast(ast)
         except Exception as e:
             logger.exception("Evaluation failed")
             self.state.add_error(ErrorCode.EVAL_INVALID_SHAPE, f"Evaluation error: {e}")
-        
-        return self.state
 
     def _eval_ast(self, ast: dict):
         """Recursively evaluate AST nodes."""
@@ -498,7 +529,8 @@ class Interpreter:
         """Convert Rust AST Shape to dict for rendering."""
         style = shape.get('style', {})
         transform = shape.get('transform', {})
-        props = shape.get('props', {})
+        # Deep copies: the parsed AST is cached and shared, nested lists/dicts included
+        props = deepcopy(shape.get('props', {}))
         
         # Get fill from style or props
         fill = style.get('fill')
@@ -506,20 +538,20 @@ class Interpreter:
             fill = props['fill']
         
         return {
-            'kind': shape['kind'],
+            'kind': intern(shape['kind']),
             'props': props,
             'style': {
-                'fill': fill,
-                'stroke': style.get('stroke'),
+                'fill': intern(fill),
+                'stroke': intern(style.get('stroke')),
                 'stroke_width': style.get('stroke_width', 1.0),
                 'opacity': style.get('opacity', 1.0),
                 'corner': style.get('corner', 0.0),
-                'font': style.get('font'),
+                'font': intern(style.get('font')),
                 'font_size': style.get('font_size', 16.0),
-                'font_weight': style.get('font_weight', 'normal'),
-                'text_anchor': style.get('text_anchor', 'start'),
-                'shadow': shape.get('shadow'),
-                'gradient': shape.get('gradient'),
+                'font_weight': intern(style.get('font_weight', 'normal')),
+                'text_anchor': intern(style.get('text_anchor', 'start')),
+                'shadow': deepcopy(shape.get('shadow')),
+                'gradient': deepcopy(shape.get('gradient')),
             },
             'transform': {
                 'translate': transform.get('translate'),
@@ -4,7 +4,8 @@ The Rust core (iconoglott_core) is the single source of truth.
 These types exist only for backward compatibility with existing Python code.
 """
 
-from dataclasses import dataclass, field
+import sys
+from dataclasses import dataclass
 from typing import Union
 
 # Re-export Rust types directly
@@ -28,34 +29,82 @@ CANVAS_SIZES = {
 
 from .errors import ErrorInfo, ErrorCode
 
+# Interned DSL vocabulary: keywords from the Rust AST arrive as fresh strings,
+# mapping them to one shared instance shrinks the shape working set and lets
+# dict lookups short-circuit on identity.
+_INTERN: dict[str, str] = {s: sys.intern(s) for s in (
+    *CANVAS_SIZES,
+    "canvas", "group", "stack", "row", "graph", "node", "edge", "symbol", "use",
+    "rect", "circle", "ellipse", "line", "path", "polygon", "text", "image", "arc", "curve", "diamond",
+    "fill", "stroke", "opacity", "corner", "shadow", "gradient", "blur", "font", "bold", "italic",
+    "at", "size", "radius", "width", "height", "from", "to", "points", "content", "href",
+    "translate", "rotate", "scale", "origin",
+    "normal", "start", "middle", "end", "center", "none",
+)}
+
+
+def intern(value):
+    """Return the shared instance of a vocabulary string; anything else passes through.
+
+    Arbitrary user values (custom colors, font names) are never added to the table,
+    so a long-running server's interned set stays bounded.
+    """
+    if value.__class__ is not str:
+        return value
+    return _INTERN.get(value, value)
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Backward compatibility wrappers (thin layers over Rust types)
 # ─────────────────────────────────────────────────────────────────────────────
 
-@dataclass(slots=True)
-class Style:
-    """Shape styling properties. Wraps Rust AstStyle."""
-    fill: str | None = None
-    stroke: str | None = None
-    stroke_width: float = 1.0
-    opacity: float = 1.0
-    corner: float = 0.0
-    font: str | None = None
-    font_size: float = 16.0
-    font_weight: str = "normal"
-    text_anchor: str = "start"
-    shadow: dict | None = None
-    gradient: dict | None = None
+class _Slotted:
+    """Base for hand-written slotted wrappers: dataclass-style eq/repr without
+    the generated __init__ (defaults and default_factory run on every build)."""
+    __slots__ = ()
 
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.__slots__)
 
-@dataclass(slots=True)
-class Transform:
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{f}={getattr(self, f)!r}" for f in self.__slots__)
+        return f"{self.__class__.__name__}({fields})"
+
+
+class Style(_Slotted):
+    """Shape styling properties. Wraps Rust AstStyle."""
+    __slots__ = ("fill", "stroke", "stroke_width", "opacity", "corner", "font",
+                 "font_size", "font_weight", "text_anchor", "shadow", "gradient")
+
+    def __init__(self, fill: str | None = None, stroke: str | None = None, stroke_width: float = 1.0,
+                 opacity: float = 1.0, corner: float = 0.0, font: str | None = None,
+                 font_size: float = 16.0, font_weight: str = "normal", text_anchor: str = "start",
+                 shadow: dict | None = None, gradient: dict | None = None):
+        self.fill = fill
+        self.stroke = stroke
+        self.stroke_width = stroke_width
+        self.opacity = opacity
+        self.corner = corner
+        self.font = font
+        self.font_size = font_size
+        self.font_weight = font_weight
+        self.text_anchor = text_anchor
+        self.shadow = shadow
+        self.gradient = gradient
+
+
+class Transform(_Slotted):
     """Transform properties. Wraps Rust AstTransform."""
-    translate: tuple[float, float] | None = None
-    rotate: float = 0.0
-    scale: tuple[float, float] | None = None
-    origin: tuple[float, float] | None = None
+    __slots__ = ("translate", "rotate", "scale", "origin")
+
+    def __init__(self, translate: tuple[float, float] | None = None, rotate: float = 0.0,
+                 scale: tuple[float, float] | None = None, origin: tuple[float, float] | None = None):
+        self.translate = translate
+        self.rotate = rotate
+        self.scale = scale
+        self.origin = origin
 
 
 @dataclass(slots=True)
@@ -73,22 +122,28 @@ class Canvas:
         return CANVAS_SIZES.get(self.size, 64)
 
 
-@dataclass(slots=True)
-class Shape:
+class Shape(_Slotted):
     """Generic shape with properties. Wraps Rust AstShape."""
-    kind: str
-    props: dict = field(default_factory=dict)
-    style: Style = field(default_factory=Style)
-    transform: Transform = field(default_factory=Transform)
-    children: list["Shape"] = field(default_factory=list)
+    __slots__ = ("kind", "props", "style", "transform", "children")
 
+    def __init__(self, kind: str, props: dict | None = None, style: Style | None = None,
+                 transform: Transform | None = None, children: list["Shape"] | None = None):
+        self.kind = kind
+        self.props = {} if props is None else props
+        self.style = Style() if style is None else style
+        self.transform = Transform() if transform is None else transform
+        self.children = [] if children is None else children
 
-@dataclass(slots=True)
-class Node:
+
+class Node(_Slotted):
     """AST node for backward compatibility."""
-    type: str
-    value: Union[str, float, Canvas, Shape, dict, None] = None
-    children: list["Node"] = field(default_factory=list)
+    __slots__ = ("type", "value", "children")
+
+    def __init__(self, type: str, value: Union[str, float, Canvas, Shape, dict, None] = None,
+                 children: list["Node"] | None = None):
+        self.type = type
+        self.value = value
+        self.children = [] if children is None else children
 
 
 # Deprecated: Use ErrorInfo from errors.py instead
@@ -1,12 +1,20 @@
-"""FastAPI application with WebSocket support."""
+"""FastAPI application with WebSocket support.
 
+FastAPI, Starlette and the WebSocket router are imported inside create_app(),
+and the module-level `app` is built on first access, so importing this module
+(or the `server` package) stays cheap until an application is actually needed.
+"""
+
+import hashlib
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
-from fastapi import FastAPI, Request, HTTPException
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
-from .ws import router as ws_router
-from lang import ErrorCode, ErrorInfo, Severity
+from typing import TYPE_CHECKING
+from lang import ErrorCode, ErrorInfo, Interpreter, Severity
+
+if TYPE_CHECKING:
+    from fastapi import FastAPI
+    from fastapi.responses import JSONResponse
 
 logger = logging.getLogger(__name__)
 
@@ -18,8 +26,9 @@ if not STATIC_DIR.exists():
     STATIC_DIR = Path(str(pkg_resources.files("iconoglott"))) / "static"
 
 
-def _error_response(code: ErrorCode, msg: str, status: int = 500) -> JSONResponse:
+def _error_response(code: ErrorCode, msg: str, status: int = 500) -> "JSONResponse":
     """Build a standardized error response."""
+    from fastapi.responses import JSONResponse
     return JSONResponse(
         status_code=status,
         content={
@@ -30,9 +39,21 @@ def _error_response(code: ErrorCode, msg: str, status: int = 500) -> JSONRespons
     )
 
 
-def create_app() -> FastAPI:
+def create_app() -> "FastAPI":
     """Create and configure the FastAPI application."""
-    app = FastAPI(title="Iconoglott", version="0.1.0")
+    from fastapi import FastAPI, Request, HTTPException
+    from fastapi.staticfiles import StaticFiles
+    from fastapi.responses import Response
+    from .ws import router as ws_router, manager
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Warm the lexer/parser/renderer once per worker so the first client skips the cold path
+        Interpreter().eval("canvas nano").to_svg()
+        yield
+        manager.shutdown()
+
+    app = FastAPI(title="Iconoglott", version="0.1.0", lifespan=lifespan)
     app.include_router(ws_router)
     
     @app.exception_handler(HTTPException)
@@ -52,6 +73,18 @@ def create_app() -> FastAPI:
     async def health():
         return {"status": "ok", "version": "0.1.0"}
 
+    # Serve the playground index from memory: no stat/open per page load, 304 on ETag match
+    index_path = STATIC_DIR / "index.html"
+    if index_path.is_file():
+        index_bytes = index_path.read_bytes()
+        etag = f'"{hashlib.blake2b(index_bytes, digest_size=8).hexdigest()}"'
+
+        @app.get("/", include_in_schema=False)
+        async def index(request: Request):
+            if request.headers.get("if-none-match") == etag:
+                return Response(status_code=304, headers={"ETag": etag})
+            return Response(index_bytes, media_type="text/html", headers={"ETag": etag})
+
     # Mount static files at root (must be after other routes)
     if STATIC_DIR.exists():
         app.mount("/", StaticFiles(directory=STATIC_DIR, html=True), name="static")
@@ -59,9 +92,23 @@ def create_app() -> FastAPI:
     return app
 
 
-app = create_app()
+def __getattr__(name: str):
+    """Build the default `app` lazily (uvicorn's `server.app:app` resolves it here)."""
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
+    import os
     import uvicorn
-    uvicorn.run("server.app:app", host="0.0.0.0", port=8765, reload=True)
+    # One process per core for CPU-bound parsing; each WebSocket stays on the worker
+    # that accepted it, so per-connection state needs no sticky sessions.
+    # WEB_CONCURRENCY=1 runs a single worker with auto-reload for development.
+    workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+    # websockets backend with permessage-deflate: SVG frames compress 5-20x on the wire
+    uvicorn.run("server.app:app", host="0.0.0.0", port=8765, reload=workers == 1, workers=workers,
+                ws="websockets", ws_per_message_deflate=True)
 
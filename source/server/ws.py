@@ -1,31 +1,50 @@
 """WebSocket handlers for real-time DSL interpretation."""
 
 import asyncio
-import json
+import contextlib
 import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from typing import Set
+import orjson
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from pydantic import BaseModel
 
 from lang import Interpreter, ErrorCode, ErrorInfo, Severity, errors_to_response
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Recent render frames kept per manager (editors often resend identical source)
+RENDER_CACHE_SIZE = 32
 
-class Message(BaseModel):
-    """WebSocket message schema."""
-    type: str
-    payload: str | dict
+# Threads running interpreter.eval off the event loop (ICONOGLOTT_EVAL_WORKERS overrides)
+EVAL_WORKERS = int(os.getenv("ICONOGLOTT_EVAL_WORKERS", min(4, os.cpu_count() or 1)))
 
 
 @dataclass
 class ConnectionState:
-    """Per-connection backpressure state for message coalescing."""
-    rendering: bool = False
-    pending_source: str | None = None
-    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    """Per-connection backpressure state for message coalescing.
+
+    `version` counts received sources; the render worker compares it against the
+    last version it rendered, so sources arriving mid-render collapse into one.
+    """
+    version: int = 0
+    pending: str | None = None
+    wake: asyncio.Event = field(default_factory=asyncio.Event)
+    worker: asyncio.Task | None = None
+
+
+def _ws_error_dict(code: ErrorCode, msg: str) -> dict:
+    """Build a WebSocket error response."""
+    return {
+        "type": "error",
+        "message": msg,
+        "errors": [ErrorInfo(code, msg, severity=Severity.ERROR).to_dict()]
+    }
 
 
 class ConnectionManager:
@@ -33,93 +52,158 @@ class ConnectionManager:
 
     def __init__(self):
         self.active: Set[WebSocket] = set()
-        self.states: dict[WebSocket, ConnectionState] = {}
-        self.interpreter = Interpreter()
+        self._executor: ThreadPoolExecutor | None = None  # Started by the first render
+        self._tls = threading.local()
+        self._cache: OrderedDict[str, bytes] = OrderedDict()
 
     async def connect(self, ws: WebSocket):
         await ws.accept()
         self.active.add(ws)
-        self.states[ws] = ConnectionState()
+        # Kept on the socket (Starlette reserves `ws.state`) - no per-message dict lookup
+        state = ws.render_state = ConnectionState()
+        state.worker = asyncio.create_task(self._render_loop(ws, state))
 
     def disconnect(self, ws: WebSocket):
         self.active.discard(ws)
-        self.states.pop(ws, None)
+        state = getattr(ws, "render_state", None)
+        if state and state.worker:
+            state.worker.cancel()
 
     async def broadcast(self, message: dict):
-        """Send message to all connected clients."""
-        data = json.dumps(message)
-        disconnected = []
-        for ws in self.active:
-            try:
-                await ws.send_text(data)
-            except Exception as e:
-                logger.warning(f"Broadcast failed: {e}")
-                disconnected.append(ws)
-        for ws in disconnected:
-            self.active.discard(ws)
+        """Send message to all connected clients concurrently."""
+        data = orjson.dumps(message)
+        targets = tuple(self.active)  # Snapshot: sends may disconnect clients
+        results = await asyncio.gather(*(ws.send_bytes(data) for ws in targets), return_exceptions=True)
+        for ws, result in zip(targets, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Broadcast failed: {result}")
+                self.active.discard(ws)
+
+    @property
+    def interpreter(self) -> Interpreter:
+        """Interpreter owned by the calling thread (interpreters carry scene state)."""
+        interp = getattr(self._tls, "interpreter", None)
+        if interp is None:
+            interp = self._tls.interpreter = Interpreter()
+        return interp
+
+    def _evaluate(self, source: str) -> tuple[str, list]:
+        """Interpret DSL source into SVG and serialized errors. Runs on a pool thread."""
+        state = self.interpreter.eval(source)
+        return state.to_svg(), errors_to_response(state.error_infos) if state.error_infos else []
+
+    async def _offload(self, source: str) -> tuple[str, list]:
+        """Evaluate on the thread pool so parsing never blocks other connections."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=EVAL_WORKERS, thread_name_prefix="iconoglott-eval")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._evaluate, source)
+
+    def shutdown(self):
+        """Stop the eval threads without waiting; a later render starts a new pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
 
     async def process(self, source: str) -> dict:
         """Interpret DSL source and return SVG with errors."""
         try:
-            state = self.interpreter.eval(source)
-            result = {"type": "render", "svg": state.to_svg()}
-            result["errors"] = errors_to_response(state.error_infos) if state.error_infos else []
-            return result
+            svg, errors = await self._offload(source)
+            return {"type": "render", "svg": svg, "errors": errors}
+        except Exception as e:
+            logger.exception("Processing failed")
+            return _ws_error_dict(ErrorCode.EVAL_INVALID_SHAPE, str(e))
+
+    async def render(self, source: str) -> bytes:
+        """Process source into an encoded frame, reusing recent identical renders."""
+        cache = self._cache
+        data = cache.get(source)
+        if data is not None:
+            cache.move_to_end(source)
+            return data
+        try:
+            svg, errors = await self._offload(source)
         except Exception as e:
             logger.exception("Processing failed")
-            return {
-                "type": "error",
-                "message": str(e),
-                "errors": [ErrorInfo(ErrorCode.EVAL_INVALID_SHAPE, str(e)).to_dict()]
-            }
+            return orjson.dumps(_ws_error_dict(ErrorCode.EVAL_INVALID_SHAPE, str(e)))
+        # Splice fragments around the SVG instead of building and encoding a result dict.
+        # Frames carrying parse errors are cached too: they are deterministic per source.
+        data = b'{"type":"render","svg":' + orjson.dumps(svg) + b',"errors":' + \
+            (orjson.dumps(errors) if errors else b"[]") + b"}"
+        cache[source] = data
+        if len(cache) > RENDER_CACHE_SIZE:
+            cache.popitem(last=False)
+        return data
 
     async def process_with_backpressure(self, ws: WebSocket, source: str) -> dict | None:
-        """Process source with coalescing - drops older pending sources."""
-        state = self.states.get(ws)
+        """Queue source for rendering - drops older pending sources."""
+        state = getattr(ws, "render_state", None)
         if not state:
             return await self.process(source)
+        state.version += 1
+        state.pending = source
+        state.wake.set()
+        return None  # Worker sends the frame
+
+    async def _render_loop(self, ws: WebSocket, state: ConnectionState):
+        """Render the newest pending source until the connection closes."""
+        rendered = 0
+        try:
+            while True:
+                await state.wake.wait()
+                state.wake.clear()
+                # Sources received during a render bump the version; loop without waiting
+                while state.version != rendered:
+                    rendered, source = state.version, state.pending
+                    await ws.send_bytes(await self.render(source))
+        except Exception:
+            # Without a worker the connection would never render again: close it instead
+            logger.exception("Render worker stopped")
+            state.worker = None
+            self.active.discard(ws)
+            with contextlib.suppress(Exception):
+                await ws.close(code=1011)
 
-        async with state.lock:
-            if state.rendering:
-                # Replace pending source - drop old, keep newest
-                state.pending_source = source
-                return None  # Signal: coalesced, no immediate response
-            state.rendering = True
 
-        try:
-            result = await self.process(source)
-            await ws.send_text(json.dumps(result))
+manager = ConnectionManager()
 
-            # Process any pending source that arrived during render
-            while True:
-                async with state.lock:
-                    next_source = state.pending_source
-                    state.pending_source = None
-                    if next_source is None:
-                        state.rendering = False
-                        break
 
-                result = await self.process(next_source)
-                await ws.send_text(json.dumps(result))
+# Pre-serialized frames for the common error codes; only the message varies
+_MSG_SLOT = b'"{msg}"'
+_ERR_TEMPLATES: dict[ErrorCode, bytes] = {
+    code: orjson.dumps(_ws_error_dict(code, "{msg}"))
+    for code in (ErrorCode.WS_INVALID_MESSAGE, ErrorCode.WS_CONNECTION_ERROR)
+}
 
-            return None  # Already sent
-        except Exception:
-            async with state.lock:
-                state.rendering = False
-                state.pending_source = None
-            raise
 
+def _ws_error(code: ErrorCode, msg: str) -> bytes:
+    """Build an encoded WebSocket error frame."""
+    template = _ERR_TEMPLATES.get(code)
+    if template is None:
+        return orjson.dumps(_ws_error_dict(code, msg))
+    return template.replace(_MSG_SLOT, orjson.dumps(msg))
 
-manager = ConnectionManager()
 
+_PONG = orjson.dumps({"type": "pong"})
+
+
+async def _handle_source(ws: WebSocket, msg: dict):
+    # Backpressure: coalesces if render in progress
+    await manager.process_with_backpressure(ws, msg.get("payload", ""))
+
+
+async def _handle_ping(ws: WebSocket, msg: dict):
+    await ws.send_bytes(_PONG)
 
-def _ws_error(code: ErrorCode, msg: str) -> dict:
-    """Build a WebSocket error response."""
-    return {
-        "type": "error",
-        "message": msg,
-        "errors": [ErrorInfo(code, msg, severity=Severity.ERROR).to_dict()]
-    }
+
+async def _handle_unknown(ws: WebSocket, msg: dict):
+    await ws.send_bytes(
+        _ws_error(ErrorCode.WS_INVALID_MESSAGE, f"Unknown message type: {msg.get('type')}")
+    )
+
+
+# Inbound message dispatch by `type` (anything else gets WS_INVALID_MESSAGE).
+# Keys are interned and so is the inbound type, so lookups hit on pointer equality.
+_HANDLERS = {sys.intern("source"): _handle_source, sys.intern("ping"): _handle_ping}
 
 
 @router.websocket("/ws")
@@ -130,26 +214,18 @@ async def websocket_endpoint(ws: WebSocket):
         while True:
             data = await ws.receive_text()
             try:
-                msg = json.loads(data)
+                msg = orjson.loads(data)
                 msg_type = msg.get("type")
-
-                if msg_type == "source":
-                    # Backpressure: coalesces if render in progress
-                    await manager.process_with_backpressure(ws, msg.get("payload", ""))
-                elif msg_type == "ping":
-                    await ws.send_text(json.dumps({"type": "pong"}))
-                else:
-                    await ws.send_text(json.dumps(
-                        _ws_error(ErrorCode.WS_INVALID_MESSAGE, f"Unknown message type: {msg_type}")
-                    ))
-            except json.JSONDecodeError:
+                msg_type = sys.intern(msg_type) if msg_type.__class__ is str else None
+                await _HANDLERS.get(msg_type, _handle_unknown)(ws, msg)
+            except orjson.JSONDecodeError:
                 # Raw source for backward compatibility
                 await manager.process_with_backpressure(ws, data)
             except Exception as e:
                 logger.exception("WebSocket handler error")
-                await ws.send_text(json.dumps(
+                await ws.send_bytes(
                     _ws_error(ErrorCode.WS_CONNECTION_ERROR, f"Internal error: {e}")
-                ))
+                )
     except WebSocketDisconnect:
         manager.disconnect(ws)
     except Exception as e:
@@ -5,6 +5,19 @@ import sys
 from pathlib import Path
 
 import pytest
+from hypothesis import HealthCheck, Phase, settings
+
+# PYTEST_FAST=1 (or HYPOTHESIS_PROFILE=fast) trims every property test:
+# fewer examples, no shrinking and no on-disk example database
+settings.register_profile("fast", max_examples=10, database=None, deadline=None,
+                          phases=[Phase.explicit, Phase.reuse, Phase.generate])
+# HYPOTHESIS_PROFILE=ci: a reproducible, quarter-size budget for pipelines
+settings.register_profile("ci", max_examples=25, derandomize=True, deadline=None,
+                          suppress_health_check=[HealthCheck.too_slow])
+if os.getenv("PYTEST_FAST") == "1":
+    settings.load_profile("fast")
+elif os.getenv("HYPOTHESIS_PROFILE"):
+    settings.load_profile(os.environ["HYPOTHESIS_PROFILE"])
 
 # Add source to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -14,12 +27,99 @@ SNAPSHOTS_DIR = Path(__file__).parent / "snapshots"
 SNAPSHOTS_DIR.mkdir(exist_ok=True)
 
 
+def pytest_collection_modifyitems(config, items):
+    """Route tests to xdist groups (honoured by --dist loadgroup).
+
+    Light/heavy markers share a group each; unmarked Hypothesis tests are grouped
+    per class, so each property class runs on its own worker in parallel.
+    """
+    if not config.pluginmanager.hasplugin("xdist"):
+        return
+    for item in items:
+        for group in ("light", "heavy"):
+            if item.get_closest_marker(group):
+                item.add_marker(pytest.mark.xdist_group(group))
+                break
+        else:
+            if getattr(getattr(item, "obj", None), "is_hypothesis_test", False):
+                owner = item.cls.__name__ if item.cls else item.module.__name__
+                item.add_marker(pytest.mark.xdist_group(f"property-{owner}"))
+
+
+def pytest_sessionstart(session):
+    """Load the Rust core's bindings and pattern table before collection, so no test absorbs it.
+
+    Skipped when the extension is not built; the tests that need it then fail on their own.
+    """
+    try:
+        import iconoglott_core as rust
+    except ImportError:
+        return
+    # Touch every lexer pattern and indent level so no regex is first built mid-test
+    rust.Lexer("a 1 2.5 #fff -10,20 50% 50%,50% 500ms 'x' \"y\" $v = : -> [ ] // c\n  c\n    d\nback").py_tokenize()
+    rust.Parser(rust.Lexer("canvas large\nrect at 0,0 size 10x10\n  fill #fff").py_tokenize()).parse_py()
+
+
+@pytest.fixture(scope="session")
+def interp():
+    """Shared interpreter - eval() starts from a fresh SceneState on every call."""
+    from lang import Interpreter
+    return Interpreter()
+
+
+@pytest.fixture(scope="session")
+def eval_with_prefix(interp):
+    """Interpret `prefix + tail` into a fresh state, parsing the shared prefix once.
+
+    The prefix must be self-contained - no open blocks or variables the tail uses.
+    A missing trailing newline is added, and tail parse errors are shifted so
+    their lines stay relative to the combined source.
+    """
+    from lang import ErrorCode, SceneState
+    from lang.eval import _parse
+
+    def run(prefix: str, tail: str):
+        if not prefix.endswith("\n"):
+            prefix += "\n"
+        interp.state = SceneState()
+        interp._eval_source(prefix)
+        ast, errors = _parse(tail)
+        offset = prefix.count("\n")
+        for message, line, col in errors:
+            interp.state.add_error(ErrorCode.PARSE_UNEXPECTED_TOKEN, message, line + offset, col)
+        interp._eval_tree(ast)
+        return interp.state
+    return run
+
+
+@pytest.fixture(scope="session")
+def eval_ast(interp):
+    """Interpret an AST in the Rust parser's `parse_py` form into a fresh state.
+
+    Skips lex and parse, so tests that vary only literal values reuse one parsed
+    tree; the AST is read, never mutated.
+    """
+    from lang import SceneState
+
+    def run(ast: dict):
+        interp.state = SceneState()
+        interp._eval_tree(ast)
+        return interp.state
+    return run
+
+
 @pytest.fixture
 def snapshot_dir():
     """Return snapshot directory for SVG snapshots."""
     return SNAPSHOTS_DIR
 
 
+@pytest.fixture(scope="session")
+def snapshots():
+    """All stored SVG snapshots by name, read in one directory pass per session."""
+    return {p.stem: p.read_bytes() for p in SNAPSHOTS_DIR.glob("*.svg")}
+
+
 @pytest.fixture
 def basic_canvas_source():
     """Basic canvas DSL source."""
@@ -1,28 +1,89 @@
 """End-to-end tests from DSL source to final SVG output."""
 
 import pytest
-from hypothesis import given, strategies as st, settings
+from hypothesis import HealthCheck, given, strategies as st, settings
 import re
+from collections import Counter
 
-from lang import Interpreter
+from lang.types import CANVAS_SIZES
 
+# Any element tag, opened ('rect') or closed ('/svg'), or a self-closing '/>'
+_TAG_RE = re.compile(rb'<(/?[A-Za-z][\w:-]*)|(/>)')
 
+# Shared canvas prefixes: parsed once, only the per-example tail is parsed
+_CANVAS_GIANT = "canvas giant\n"
+
+# Fifty offset rects, built once at import
+_MANY_RECTS = "\n".join(f"rect at {i*10},{i*5} size 20x20\n  fill #f00" for i in range(50))
+
+# Rust integration scene: canvas, plain shapes, a gradient and a shadow filter in one render
+_RUST_SCENE = """canvas giant fill #1a1a2e
+rect at 10,10 size 100x100
+  fill #e94560
+circle at 200,200 radius 50
+  fill #16213e
+rect at 0,0 size 400x300
+  gradient linear #e94560 #16213e
+rect at 50,50 size 300x200
+  fill #e94560
+  shadow 4,4 8 #0008"""
+
+# Property tests: no deadline retries on cold starts, deterministic, no example database I/O
+_PBT = settings(deadline=None, derandomize=True, database=None, suppress_health_check=[HealthCheck.too_slow])
+
+# Property strategies, built once at import rather than per decorator evaluation
+_CANVAS_SIZE = st.sampled_from(list(CANVAS_SIZES))
+_BG_COLOR = st.integers(0, 0xFFFFFF).map(lambda n: f"#{n:06x}")  # int-backed: cheap draws, monotone shrinking
+# Flat x,y coordinate run: one list draw per example instead of a tuple per point
+_POLYGON_COORDS = st.integers(min_value=3, max_value=8).flatmap(
+    lambda n: st.lists(st.integers(min_value=0, max_value=400), min_size=2 * n, max_size=2 * n)
+)
+
+# Per-example sources: fixed %-templates, filled with one format call each
+_CANVAS_TMPL = "canvas %s fill %s"
+_RECT_TMPL = "rect at %d,%d size %dx%d\n  fill #f00\n  corner %d"
+_CIRCLE_TMPL = "circle at %d,%d radius %d\n  fill #0f0"
+_POLYGON_TMPL = "polygon points [%s]\n  fill #ff0"
+
+# Rect edge cases (bounds of the fuzz ranges, unit steps, mixed extremes)
+_RECT_MATRIX = [
+    (0, 0, 10, 10, 0), (0, 0, 200, 200, 20), (500, 500, 10, 10, 0), (500, 500, 200, 200, 20),
+    (1, 1, 11, 11, 1), (0, 500, 10, 200, 0), (500, 0, 200, 10, 20), (250, 250, 100, 50, 8),
+    (1, 499, 199, 11, 19), (499, 1, 11, 199, 1), (10, 10, 100, 100, 0), (123, 456, 78, 90, 12),
+]
+
+
+def _assert_rect_roundtrip(eval_with_prefix, x: int, y: int, w: int, h: int, corner: int):
+    """Render a rect on the giant canvas and check its geometry attributes."""
+    svg = eval_with_prefix(_CANVAS_GIANT, _RECT_TMPL % (x, y, w, h, corner)).to_svg()
+    assert f'x="{x}"' in svg
+    assert f'y="{y}"' in svg
+    assert f'width="{w}"' in svg
+    assert f'height="{h}"' in svg
+
+
+def _tag_counts(svg: str) -> Counter:
+    """Tally 'rect' opens, '/rect' closes and '/>' self-closes in one pass over the SVG's bytes."""
+    return Counter((name or end).decode() for name, end in _TAG_RE.findall(svg.encode()))
+
+
+@pytest.mark.heavy
 class TestE2ERoundtrip:
     """End-to-end roundtrip tests."""
 
-    def test_basic_scene_renders(self):
+    def test_basic_scene_renders(self, interp):
         """Basic scene should render without errors."""
         source = """canvas giant fill #1a1a2e
 rect at 50,50 size 200x100
   fill #e94560
   corner 8"""
-        state = Interpreter().eval(source)
+        state = interp.eval(source)
         svg = state.to_svg()
         assert '<svg' in svg
         assert '</svg>' in svg
         assert len(state.errors) == 0
 
-    def test_complex_scene_renders(self):
+    def test_complex_scene_renders(self, interp):
         """Complex scene with multiple elements should render."""
         source = """canvas giant fill #1a1a2e
 $primary = #e94560
@@ -56,41 +117,35 @@ group "rotated"
   rect at 500,300 size 80x80
     fill #f0f
     rotate 45"""
-        state = Interpreter().eval(source)
+        state = interp.eval(source)
         svg = state.to_svg()
-        assert '<svg' in svg
-        assert '</svg>' in svg
-        # Check key elements present
-        assert '<rect' in svg
-        assert '<circle' in svg
-        assert '<ellipse' in svg
-        assert '<line' in svg
-        assert '<text' in svg
-        assert '<polygon' in svg
+        # Check document and key elements present
+        expected = {'svg', '/svg', 'rect', 'circle', 'ellipse', 'line', 'text', 'polygon'}
+        assert expected <= _tag_counts(svg).keys()
 
-    def test_gradient_renders_in_defs(self):
+    def test_gradient_renders_in_defs(self, interp):
         """Gradients should render in defs section."""
         source = """canvas massive
 rect at 50,50 size 300x300
   gradient linear #f00 #00f 45"""
-        state = Interpreter().eval(source)
+        state = interp.eval(source)
         svg = state.to_svg()
         assert '<defs>' in svg
         assert '<linearGradient' in svg
         assert 'url(#' in svg
 
-    def test_filter_renders_in_defs(self):
+    def test_filter_renders_in_defs(self, interp):
         """Filters (shadows) should render in defs section."""
         source = """canvas massive
 rect at 50,50 size 300x300
   fill #e94560
   shadow 4,4 10 #0008"""
-        state = Interpreter().eval(source)
+        state = interp.eval(source)
         svg = state.to_svg()
         # Shadow creates a filter
         assert '<defs>' in svg
 
-    def test_layout_positions_children(self):
+    def test_layout_positions_children(self, interp):
         """Stack/row layouts should position children correctly."""
         source = """canvas massive
 stack at 50,50 gap 20
@@ -100,79 +155,81 @@ stack at 50,50 gap 20
     fill #0f0
   rect size 100x50
     fill #00f"""
-        state = Interpreter().eval(source)
+        state = interp.eval(source)
         svg = state.to_svg()
         # All three rects should be present
         assert svg.count('<rect') >= 4  # 1 bg + 3 shapes
 
-    def test_transform_applied(self):
+    def test_transform_applied(self, interp):
         """Transforms should be applied to SVG elements."""
         source = """canvas huge
 rect at 100,100 size 50x50
   fill #f00
   rotate 45
   translate 10,10"""
-        state = Interpreter().eval(source)
+        state = interp.eval(source)
         # Transform info should be in shape data
         assert state.shapes[0]['transform']['rotate'] == 45
-        assert list(state.shapes[0]['transform']['translate']) == [10.0, 10.0]
+        assert state.shapes[0]['transform']['translate'] == (10.0, 10.0)
 
 
 class TestE2EValidSVG:
     """Tests that output is valid SVG."""
 
-    def test_svg_has_namespace(self):
+    def test_svg_has_namespace(self, interp):
         source = "canvas large"
-        state = Interpreter().eval(source)
+        state = interp.eval(source)
         svg = state.to_svg()
         assert 'xmlns="http://www.w3.org/2000/svg"' in svg
 
-    def test_svg_is_well_formed(self):
+    def test_svg_is_well_formed(self, interp):
         """SVG should be well-formed XML (basic check)."""
         source = """canvas massive
 rect at 0,0 size 100x100
   fill #f00
 text at 50,50 "Test"
   fill #000"""
-        state = Interpreter().eval(source)
+        state = interp.eval(source)
         svg = state.to_svg()
+        tags = _tag_counts(svg)
         # Count opening and closing tags
-        assert svg.count('<svg') == 1
-        assert svg.count('</svg>') == 1
+        assert tags['svg'] == 1
+        assert tags['/svg'] == 1
         # All elements should be properly closed
         for tag in ['rect', 'circle', 'ellipse', 'line', 'path', 'polygon', 'image']:
-            opens = svg.count(f'<{tag}')
-            closes = svg.count(f'</{tag}>') + svg.count('/>')  # self-closing
-            assert opens <= closes or opens == svg.count(f'<{tag} ') + svg.count(f'<{tag}/')
+            assert tags[tag] <= tags['/' + tag] + tags['/>']  # self-closing
 
-    def test_special_chars_escaped(self):
+    def test_special_chars_escaped(self, interp):
         """Special characters in text should be escaped."""
         source = '''text at 10,20 "<script>alert('xss')</script>"'''
-        state = Interpreter().eval(source)
+        state = interp.eval(source)
         svg = state.to_svg()
+        # Smoke check of the full pipeline; escaping rules are unit-tested in test_eval
         assert '<script>' not in svg
-        assert '&lt;' in svg or '&gt;' in svg
+        assert '&lt;script&gt;' in svg
 
 
 class TestE2EPropertyBased:
     """Property-based E2E tests."""
 
-    @given(
-        st.sampled_from(['nano', 'micro', 'tiny', 'small', 'medium', 'large', 'xlarge', 'huge', 'massive', 'giant']),
-        st.from_regex(r'#[0-9a-fA-F]{6}', fullmatch=True)
-    )
-    @settings(max_examples=20)
-    def test_canvas_roundtrip(self, size, bg):
+    @pytest.mark.slow
+    @given(_CANVAS_SIZE, _BG_COLOR)
+    @settings(_PBT, max_examples=20)
+    def test_canvas_roundtrip(self, interp, size, bg):
         """Canvas dimensions and background should roundtrip."""
-        sizes = {'nano': 16, 'micro': 24, 'tiny': 32, 'small': 48, 'medium': 64, 'large': 96, 'xlarge': 128, 'huge': 192, 'massive': 256, 'giant': 512}
-        source = f"canvas {size} fill {bg}"
-        state = Interpreter().eval(source)
+        state = interp.eval(_CANVAS_TMPL % (size, bg))
         svg = state.to_svg()
-        expected = sizes[size]
+        expected = CANVAS_SIZES[size]
         assert f'width="{expected}"' in svg
         assert f'height="{expected}"' in svg
         assert bg.lower() in svg.lower()
 
+    @pytest.mark.parametrize("x,y,w,h,corner", _RECT_MATRIX)
+    def test_rect_roundtrip(self, eval_with_prefix, x, y, w, h, corner):
+        """Rect properties should roundtrip through SVG."""
+        _assert_rect_roundtrip(eval_with_prefix, x, y, w, h, corner)
+
+    @pytest.mark.slow
     @given(
         st.integers(min_value=0, max_value=500),
         st.integers(min_value=0, max_value=500),
@@ -180,153 +237,112 @@ class TestE2EPropertyBased:
         st.integers(min_value=10, max_value=200),
         st.integers(min_value=0, max_value=20)
     )
-    @settings(max_examples=20)
-    def test_rect_roundtrip(self, x, y, w, h, corner):
-        """Rect properties should roundtrip through SVG."""
-        source = f"""canvas giant
-rect at {x},{y} size {w}x{h}
-  fill #f00
-  corner {corner}"""
-        state = Interpreter().eval(source)
-        svg = state.to_svg()
-        assert f'x="{x}"' in svg
-        assert f'y="{y}"' in svg
-        assert f'width="{w}"' in svg
-        assert f'height="{h}"' in svg
+    @settings(_PBT, max_examples=5)
+    def test_rect_roundtrip_fuzz(self, eval_with_prefix, x, y, w, h, corner):
+        """Random rects beyond the fixed matrix should roundtrip too."""
+        _assert_rect_roundtrip(eval_with_prefix, x, y, w, h, corner)
 
+    @pytest.mark.slow
     @given(
         st.integers(min_value=50, max_value=500),
         st.integers(min_value=50, max_value=500),
         st.integers(min_value=5, max_value=100)
     )
-    @settings(max_examples=20)
-    def test_circle_roundtrip(self, cx, cy, r):
+    @settings(_PBT, max_examples=20)
+    def test_circle_roundtrip(self, eval_with_prefix, cx, cy, r):
         """Circle properties should roundtrip through SVG."""
-        source = f"""canvas giant
-circle at {cx},{cy} radius {r}
-  fill #0f0"""
-        state = Interpreter().eval(source)
+        state = eval_with_prefix(_CANVAS_GIANT, _CIRCLE_TMPL % (cx, cy, r))
         svg = state.to_svg()
         # Allow for float formatting
         assert 'cx=' in svg
         assert 'cy=' in svg
         assert 'r=' in svg
 
-    @given(st.lists(
-        st.tuples(
-            st.integers(min_value=0, max_value=400),
-            st.integers(min_value=0, max_value=400)
-        ),
-        min_size=3,
-        max_size=8
-    ))
-    @settings(max_examples=10)
-    def test_polygon_roundtrip(self, points):
+    @pytest.mark.slow
+    @given(_POLYGON_COORDS)
+    @settings(_PBT, max_examples=10)
+    def test_polygon_roundtrip(self, eval_with_prefix, coords):
         """Polygon points should roundtrip through SVG."""
-        points_str = " ".join(f"{x},{y}" for x, y in points)
-        source = f"""canvas giant
-polygon points [{points_str}]
-  fill #ff0"""
-        state = Interpreter().eval(source)
+        xy = iter(coords)
+        points_str = " ".join("%d,%d" % pair for pair in zip(xy, xy))
+        state = eval_with_prefix(_CANVAS_GIANT, _POLYGON_TMPL % points_str)
         svg = state.to_svg()
         assert '<polygon' in svg
         assert 'points=' in svg
 
 
+@pytest.mark.heavy
 class TestE2ERustIntegration:
     """Tests for Rust core integration."""
 
-    def test_rust_scene_creation(self):
+    @pytest.fixture(scope="class")
+    def rust_svg(self, interp):
+        """One scene covering canvas, shapes, gradient and filter, rendered once per class."""
+        return interp.eval(_RUST_SCENE).to_svg()
+
+    def test_rust_scene_creation(self, rust_svg):
         """Rust Scene should be created correctly."""
-        source = "canvas giant fill #1a1a2e"
-        state = Interpreter().eval(source)
-        svg = state.to_svg()
-        assert '<svg' in svg
-        assert 'width="512"' in svg
-        assert 'height="512"' in svg
+        assert '<svg' in rust_svg
+        assert 'width="512"' in rust_svg
+        assert 'height="512"' in rust_svg
 
-    def test_rust_shape_rendering(self):
+    def test_rust_shape_rendering(self, rust_svg):
         """Shapes should be rendered by Rust core."""
-        source = """canvas massive
-rect at 10,10 size 100x100
-  fill #e94560
-circle at 200,200 radius 50
-  fill #16213e"""
-        state = Interpreter().eval(source)
-        svg = state.to_svg()
-        # Rust should render these shapes
-        assert '<rect' in svg
-        assert '<circle' in svg
+        assert {'rect', 'circle'} <= _tag_counts(rust_svg).keys()
 
-    def test_rust_gradient_rendering(self):
+    def test_rust_gradient_rendering(self, rust_svg):
         """Gradients should be rendered by Rust core."""
-        source = """canvas massive
-rect at 0,0 size 400x300
-  gradient linear #e94560 #16213e"""
-        state = Interpreter().eval(source)
-        svg = state.to_svg()
-        assert '<linearGradient' in svg
+        assert '<linearGradient' in rust_svg
 
-    def test_rust_filter_rendering(self):
+    def test_rust_filter_rendering(self, rust_svg):
         """Filters should be rendered by Rust core."""
-        source = """canvas massive
-rect at 50,50 size 300x200
-  fill #e94560
-  shadow 4,4 8 #0008"""
-        state = Interpreter().eval(source)
-        svg = state.to_svg()
-        assert '<filter' in svg
+        assert '<filter' in rust_svg
 
 
 class TestE2EEdgeCases:
     """Edge case E2E tests."""
 
-    def test_empty_scene(self):
+    def test_empty_scene(self, interp):
         """Empty source should produce valid empty SVG."""
-        state = Interpreter().eval("")
+        state = interp.eval("")
         svg = state.to_svg()
         assert '<svg' in svg
         assert '</svg>' in svg
 
-    def test_very_large_coordinates(self):
+    def test_very_large_coordinates(self, interp):
         """Large coordinates should work (shapes can extend beyond canvas)."""
         source = """canvas giant
 rect at 5000,5000 size 1000x1000
   fill #f00"""
-        state = Interpreter().eval(source)
+        state = interp.eval(source)
         svg = state.to_svg()
         assert 'width="512"' in svg
         assert '<rect' in svg
         assert 'x="5000"' in svg
 
-    def test_zero_dimensions(self):
+    def test_zero_dimensions(self, interp):
         """Zero-size shapes should still render."""
         source = """canvas large
 rect at 10,10 size 0x0
   fill #f00"""
-        state = Interpreter().eval(source)
+        state = interp.eval(source)
         svg = state.to_svg()
         # Should not crash
         assert '<svg' in svg
 
-    def test_negative_coordinates(self):
+    def test_negative_coordinates(self, interp):
         """Negative coordinates should work."""
         source = """canvas massive
 rect at -50,-50 size 100x100
   fill #f00"""
-        state = Interpreter().eval(source)
+        state = interp.eval(source)
         svg = state.to_svg()
         assert 'x="-50"' in svg
 
-    def test_many_shapes(self):
+    def test_many_shapes(self, eval_with_prefix):
         """Scene with many shapes should render."""
-        shapes = "\n".join([
-            f"rect at {i*10},{i*5} size 20x20\n  fill #f00"
-            for i in range(50)
-        ])
-        source = f"canvas giant\n{shapes}"
-        state = Interpreter().eval(source)
+        state = eval_with_prefix(_CANVAS_GIANT, _MANY_RECTS)
         svg = state.to_svg()
         # Should have many rects
-        assert svg.count('<rect') >= 50
+        assert _tag_counts(svg)['rect'] >= 50
 
@@ -1,266 +1,150 @@
 """Tests for the DSL interpreter/evaluator."""
 import pytest
-from lang.eval import Interpreter, SceneState
-from lang.types import Canvas
+from lang.eval import SceneState, _escape_xml, _parse
+from lang.types import _INTERN, Canvas, Shape, intern
 
 
 class TestInterpreterBasics:
     """Basic interpreter functionality."""
 
-    def test_empty_source(self):
-        """Empty source returns default state."""
-        state = Interpreter().eval("")
-        assert state.canvas.size == "medium"
-        assert state.canvas.width == 64
-        assert state.canvas.height == 64
-
-    def test_canvas_only(self):
-        """Canvas-only source sets dimensions."""
-        state = Interpreter().eval("canvas giant")
-        assert state.canvas.size == "giant"
-        assert state.canvas.width == 512
-        assert state.canvas.height == 512
-
-    def test_canvas_with_fill(self):
-        """Canvas with fill color."""
-        state = Interpreter().eval("canvas massive fill #123")
-        assert state.canvas.fill == "#123"
+    @pytest.mark.parametrize("source,size,dim,fill", [
+        ("", "medium", 64, None),  # empty source keeps the default canvas
+        ("canvas giant", "giant", 512, None),
+        ("canvas massive fill #123", "massive", 256, "#123"),
+    ], ids=["empty", "canvas-only", "canvas-fill"])
+    def test_canvas_basic(self, interp, source, size, dim, fill):
+        """Canvas size, dimensions and fill follow the source."""
+        canvas = interp.eval(source).canvas
+        assert (canvas.size, canvas.width, canvas.height) == (size, dim, dim)
+        if fill:
+            assert canvas.fill == fill
+
+    def test_repeat_eval_independent_states(self, interp):
+        """Repeated source reuses the cached parse but never shares shape state."""
+        source = "rect at 10,20 size 30x40"
+        first = interp.eval(source)
+        first.shapes[0]['props']['at'] = (0, 0)
+        second = interp.eval(source)
+        assert second is not first
+        assert second.shapes[0]['props']['at'] == (10, 20)
+
+    def test_repeat_eval_nested_state_not_shared(self, interp):
+        """Nested props and style dicts are copies, not the cached AST's objects."""
+        source = "polygon [0,0 100,0 50,100]\n  gradient linear #f00 -> #00f"
+        first = interp.eval(source).shapes[0]
+        first['props']['points'].append((1, 1))
+        first['style']['gradient']['gtype'] = 'radial'
+        second = interp.eval(source).shapes[0]
+        assert len(second['props']['points']) == 3
+        assert second['style']['gradient']['gtype'] == 'linear'
+
+    def test_eval_ast_matches_eval(self, interp, eval_ast):
+        """The AST helper renders the same scene as the source it was parsed from."""
+        source = "canvas huge\nrect at 10,20 size 30x40\n  fill #f00"
+        ast, _ = _parse(source)
+        assert eval_ast(ast).to_svg() == interp.eval(source).to_svg()
+
+    @pytest.mark.parametrize("prefix", ["canvas giant\n", "canvas giant"], ids=["newline", "no-newline"])
+    def test_eval_with_prefix_matches_eval(self, interp, eval_with_prefix, prefix):
+        """The prefix helper renders the same scene as the combined source."""
+        tail = "circle at 50,50 radius 20\n  fill #0f0"
+        combined = interp.eval("canvas giant\n" + tail).to_svg()
+        assert eval_with_prefix(prefix, tail).to_svg() == combined
+
+
+# (shape line on a massive canvas, expected kind, expected props entries)
+_SHAPE_CASES = {
+    "rect": ("rect size 100x80 at 10,20", 'rect', {'size': (100, 80), 'at': (10, 20)}),
+    "circle": ("circle radius 50 at 100,100", 'circle', {'radius': 50}),
+    "ellipse": ("ellipse radius 50,30 at 100,100", 'ellipse', {'radius': (50, 30)}),
+    "line": ("line from 0,0 to 100,100", 'line', {}),
+    "path": ('path "M0 0 L100 100"', 'path', {}),
+    "polygon": ("polygon [0,0 100,0 50,100]", 'polygon', {}),
+    "text": ('text "Hello" at 50,50', 'text', {'content': "Hello"}),
+    "image": ('image href "test.png" size 100x80 at 10,20', 'image', {'href': "test.png"}),
+}
+
+# (rect modifier line, expected style entries) - None only requires the entry to be set
+_STYLE_CASES = {
+    "fill": ("fill #f00", {'fill': "#f00"}),
+    "stroke": ("stroke #00f 2", {'stroke': "#00f", 'stroke_width': 2}),
+    "opacity": ("opacity 0.5", {'opacity': 0.5}),
+    "gradient": ("gradient linear #f00 -> #00f", {'gradient': None}),
+    "shadow": ("shadow 2,4 8 #0004", {'shadow': None}),
+    "combined": ("fill #f00\n    stroke #000 2\n    shadow 2,4 8 #0004\n    gradient linear #f00 -> #00f",
+                 {'fill': "#f00", 'stroke': "#000", 'shadow': None, 'gradient': None}),
+}
 
 
 class TestInterpreterShapes:
     """Shape evaluation tests."""
 
-    def test_rect_basic(self):
-        """Basic rect evaluation."""
-        state = Interpreter().eval("""
-canvas massive
-rect size 100x80 at 10,20
-""")
-        assert len(state.shapes) == 1
-        assert state.shapes[0]['kind'] == 'rect'
-        assert state.shapes[0]['props']['size'] == (100, 80)
-        assert state.shapes[0]['props']['at'] == (10, 20)
-
-    def test_circle_basic(self):
-        """Basic circle evaluation."""
-        state = Interpreter().eval("""
-canvas massive
-circle radius 50 at 100,100
-""")
-        assert len(state.shapes) == 1
-        assert state.shapes[0]['kind'] == 'circle'
-        assert state.shapes[0]['props']['radius'] == 50
-
-    def test_ellipse_basic(self):
-        """Basic ellipse evaluation."""
-        state = Interpreter().eval("""
-canvas massive
-ellipse radius 50,30 at 100,100
-""")
-        assert len(state.shapes) == 1
-        assert state.shapes[0]['kind'] == 'ellipse'
-        assert state.shapes[0]['props']['radius'] == (50, 30)
-
-    def test_line_basic(self):
-        """Basic line evaluation."""
-        state = Interpreter().eval("""
-canvas massive
-line from 0,0 to 100,100
-""")
-        assert len(state.shapes) == 1
-        assert state.shapes[0]['kind'] == 'line'
-
-    def test_path_basic(self):
-        """Basic path evaluation."""
-        state = Interpreter().eval("""
-canvas massive
-path "M0 0 L100 100"
-""")
-        assert len(state.shapes) == 1
-        assert state.shapes[0]['kind'] == 'path'
-
-    def test_polygon_basic(self):
-        """Basic polygon evaluation."""
-        state = Interpreter().eval("""
-canvas massive
-polygon [0,0 100,0 50,100]
-""")
-        assert len(state.shapes) == 1
-        assert state.shapes[0]['kind'] == 'polygon'
-
-    def test_text_basic(self):
-        """Basic text evaluation."""
-        state = Interpreter().eval("""
-canvas massive
-text "Hello" at 50,50
-""")
-        assert len(state.shapes) == 1
-        assert state.shapes[0]['kind'] == 'text'
-        assert state.shapes[0]['props']['content'] == "Hello"
-
-    def test_image_basic(self):
-        """Basic image evaluation."""
-        state = Interpreter().eval("""
-canvas massive
-image href "test.png" size 100x80 at 10,20
-""")
+    @pytest.mark.parametrize("line,kind,props", list(_SHAPE_CASES.values()), ids=list(_SHAPE_CASES))
+    def test_shape(self, interp, line, kind, props):
+        """Each shape evaluates to one entry of its kind with the given props."""
+        state = interp.eval(f"canvas massive\n{line}")
         assert len(state.shapes) == 1
-        assert state.shapes[0]['kind'] == 'image'
-        assert state.shapes[0]['props']['href'] == "test.png"
+        assert state.shapes[0]['kind'] == kind
+        for key, value in props.items():
+            assert state.shapes[0]['props'][key] == value
 
 
 class TestInterpreterStyles:
     """Style evaluation tests."""
 
-    def test_fill_style(self):
-        """Fill style on shape."""
-        state = Interpreter().eval("""
-canvas massive
-rect 100x80
-    fill #f00
-""")
-        assert state.shapes[0]['style']['fill'] == "#f00"
-
-    def test_stroke_style(self):
-        """Stroke style on shape."""
-        state = Interpreter().eval("""
-canvas massive
-rect 100x80
-    stroke #00f 2
-""")
-        assert state.shapes[0]['style']['stroke'] == "#00f"
-        assert state.shapes[0]['style']['stroke_width'] == 2
-
-    def test_opacity_style(self):
-        """Opacity style on shape."""
-        state = Interpreter().eval("""
-canvas massive
-rect 100x80
-    opacity 0.5
-""")
-        assert state.shapes[0]['style']['opacity'] == 0.5
-
-    def test_gradient_style(self):
-        """Gradient style on shape."""
-        state = Interpreter().eval("""
-canvas massive
-rect 100x80
-    gradient linear #f00 -> #00f
-""")
-        assert state.shapes[0]['style']['gradient'] is not None
-
-    def test_shadow_style(self):
-        """Shadow style on shape."""
-        state = Interpreter().eval("""
-canvas massive
-rect 100x80
-    shadow 2,4 8 #0004
-""")
-        assert state.shapes[0]['style']['shadow'] is not None
+    @pytest.mark.parametrize("modifier,expected", list(_STYLE_CASES.values()), ids=list(_STYLE_CASES))
+    def test_style(self, interp, modifier, expected):
+        """Style modifiers land in the shape's style dict."""
+        style = interp.eval(f"canvas massive\nrect 100x80\n    {modifier}").shapes[0]['style']
+        for key, value in expected.items():
+            if value is None:
+                assert style[key] is not None
+            else:
+                assert style[key] == value
+
+
+# (source, substrings expected in its SVG) for the per-shape rendering checks
+_SVG_CASES = {
+    "basic": ("canvas massive #1a1a2e\nrect 100x80 at 50,50\n    fill #f00",
+              ('<svg', 'width="256"', 'height="256"', '<rect')),
+    "circle": ("canvas huge\ncircle r50 at 100,100\n    fill #0f0", ('<circle', 'r="50"')),
+    "ellipse": ("canvas huge\nellipse r80x40 at 100,100\n    fill #00f", ('<ellipse', 'rx=')),
+    "text": ('canvas huge\ntext "Test" at 20,50\n    font "Arial" 20', ('<text', 'Test')),
+    "line": ("canvas huge\nline 10,10 -> 190,190\n    stroke #f00 2", ('<line',)),
+    "path": ('canvas huge\npath "M10 10 L190 10 L100 180 Z"\n    fill #f0f', ('<path',)),
+    "polygon": ("canvas huge\npolygon [10,10 190,10 100,180]\n    fill #ff0", ('<polygon',)),
+    "gradient": ("canvas huge\nrect 180x180 at 10,10\n    gradient linear #f00 -> #00f 45",
+                 ('<defs>', 'linearGradient')),
+    # Shadow is registered but filter might not be in output depending on impl
+    "shadow": ("canvas huge\nrect 100x100 at 50,50\n    shadow 2,4 8 #0006", ('<svg',)),
+}
 
 
 class TestInterpreterSVG:
     """SVG rendering tests."""
 
-    def test_to_svg_basic(self):
-        """Basic SVG output."""
-        state = Interpreter().eval("""
-canvas massive #1a1a2e
-rect 100x80 at 50,50
-    fill #f00
-""")
-        svg = state.to_svg()
-        assert '<svg' in svg
-        assert 'width="256"' in svg
-        assert 'height="256"' in svg
-        assert '<rect' in svg
-
-    def test_to_svg_circle(self):
-        """Circle SVG output."""
-        state = Interpreter().eval("""
-canvas huge
-circle r50 at 100,100
-    fill #0f0
-""")
-        svg = state.to_svg()
-        assert '<circle' in svg
-        assert 'r="50"' in svg
-
-    def test_to_svg_ellipse(self):
-        """Ellipse SVG output."""
-        state = Interpreter().eval("""
-canvas huge
-ellipse r80x40 at 100,100
-    fill #00f
-""")
-        svg = state.to_svg()
-        assert '<ellipse' in svg
-        assert 'rx="80"' in svg or 'rx=' in svg
-
-    def test_to_svg_text(self):
-        """Text SVG output."""
-        state = Interpreter().eval("""
-canvas huge
-text "Test" at 20,50
-    font "Arial" 20
-""")
-        svg = state.to_svg()
-        assert '<text' in svg
-        assert 'Test' in svg
-
-    def test_to_svg_line(self):
-        """Line SVG output."""
-        state = Interpreter().eval("""
-canvas huge
-line 10,10 -> 190,190
-    stroke #f00 2
-""")
-        svg = state.to_svg()
-        assert '<line' in svg
+    @pytest.mark.parametrize("source,expected", list(_SVG_CASES.values()), ids=list(_SVG_CASES))
+    def test_to_svg(self, interp, source, expected):
+        """Each shape renders its element and key attributes."""
+        svg = interp.eval(source).to_svg()
+        for needle in expected:
+            assert needle in svg
 
-    def test_to_svg_path(self):
-        """Path SVG output."""
-        state = Interpreter().eval("""
+    def test_to_svg_rerender(self, interp):
+        """Re-rendering never duplicates defs and reflects later state changes."""
+        state = interp.eval("""
 canvas huge
-path "M10 10 L190 10 L100 180 Z"
-    fill #f0f
-""")
-        svg = state.to_svg()
-        assert '<path' in svg
-
-    def test_to_svg_polygon(self):
-        """Polygon SVG output."""
-        state = Interpreter().eval("""
-canvas huge
-polygon [10,10 190,10 100,180]
-    fill #ff0
-""")
-        svg = state.to_svg()
-        assert '<polygon' in svg
-
-    def test_to_svg_gradient(self):
-        """Gradient defs in SVG."""
-        state = Interpreter().eval("""
-canvas huge
-rect 180x180 at 10,10
-    gradient linear #f00 -> #00f 45
-""")
-        svg = state.to_svg()
-        assert '<defs>' in svg
-        assert 'linearGradient' in svg
-
-    def test_to_svg_shadow(self):
-        """Shadow filter in SVG."""
-        state = Interpreter().eval("""
-canvas huge
-rect 100x100 at 50,50
-    shadow 2,4 8 #0006
+rect 100x100
+    gradient linear #f00 -> #00f
 """)
         svg = state.to_svg()
-        # Shadow is registered but filter might not be in output depending on impl
-        assert '<svg' in svg
+        assert state.to_svg() == svg
+        assert svg.count('<linearGradient') == 1
+        state.canvas.fill = "#123456"
+        assert "#123456" in state.to_svg()
 
 
+@pytest.mark.light
 class TestSceneState:
     """SceneState unit tests."""
 
@@ -289,6 +173,11 @@ class TestSceneState:
         assert 'Test error' in svg
         assert '#f85149' in svg  # Error color
 
+    def test_escape_xml(self):
+        """Markup characters become entities, ampersands first."""
+        assert _escape_xml("<script>") == "&lt;script&gt;"
+        assert _escape_xml("a & <b>") == "a &amp; &lt;b&gt;"
+
     def test_error_svg_escapes_html(self):
         """Error SVG escapes HTML."""
         state = SceneState()
@@ -297,62 +186,85 @@ class TestSceneState:
         assert '<script>' not in svg
 
 
+@pytest.mark.light
+class TestShapeWrapper:
+    """Backward-compatible Shape wrapper."""
+
+    def test_defaults_are_fresh_containers(self):
+        """Every default is a real, unshared container."""
+        a, b = Shape("rect"), Shape("rect")
+        a.props["x"] = 1
+        a.children.append(Shape("circle"))
+        a.style.fill = "#f00"
+        assert (b.props, b.children, b.style.fill) == ({}, [], None)
+        assert Shape("rect") == Shape("rect", props={}, children=[])
+
+
+@pytest.mark.light
+class TestIntern:
+    """Interning of DSL vocabulary."""
+
+    def test_vocabulary_is_shared(self):
+        """Keywords resolve to the one pre-seeded instance."""
+        assert intern("".join(["re", "ct"])) is _INTERN["rect"]
+
+    def test_user_values_pass_through(self):
+        """Values outside the vocabulary are returned as-is and never added."""
+        color = "".join(["#", "a1b2c3"])
+        assert intern(color) is color
+        assert color not in _INTERN
+
+
+@pytest.mark.light
 class TestMeasurement:
     """Layout measurement tests."""
 
     def test_measure_rect_width(self):
         """Measure rect width."""
-        state = SceneState()
         s = {'kind': 'rect', 'props': {'size': (100, 80)}, 'style': {}}
-        assert state._measure_width(s) == 100.0
+        assert SceneState._measure_width(s) == 100.0
 
     def test_measure_rect_height(self):
         """Measure rect height."""
-        state = SceneState()
         s = {'kind': 'rect', 'props': {'size': (100, 80)}, 'style': {}}
-        assert state._measure_height(s) == 80.0
+        assert SceneState._measure_height(s) == 80.0
 
     def test_measure_circle_width(self):
         """Measure circle width by radius."""
-        state = SceneState()
         s = {'kind': 'circle', 'props': {'radius': 25}, 'style': {}}
-        assert state._measure_width(s) == 50.0  # diameter
+        assert SceneState._measure_width(s) == 50.0  # diameter
 
     def test_measure_circle_height(self):
         """Measure circle height by radius."""
-        state = SceneState()
         s = {'kind': 'circle', 'props': {'radius': 25}, 'style': {}}
-        assert state._measure_height(s) == 50.0  # diameter
+        assert SceneState._measure_height(s) == 50.0  # diameter
 
     def test_measure_text_width(self):
         """Measure text width estimate."""
-        state = SceneState()
         s = {'kind': 'text', 'props': {'content': 'Hello'}, 'style': {'font_size': 16}}
-        w = state._measure_width(s)
+        w = SceneState._measure_width(s)
         assert w > 0
         assert w == 5 * 16 * 0.6  # 5 chars * size * factor
 
     def test_measure_text_height(self):
         """Measure text height estimate."""
-        state = SceneState()
         s = {'kind': 'text', 'props': {'content': 'Test'}, 'style': {'font_size': 20}}
-        h = state._measure_height(s)
+        h = SceneState._measure_height(s)
         assert h == 20 * 1.2
 
     def test_measure_fallback(self):
         """Measure fallback for unknown shapes."""
-        state = SceneState()
         s = {'kind': 'unknown', 'props': {}, 'style': {}}
-        assert state._measure_width(s) == 40.0
-        assert state._measure_height(s) == 40.0
+        assert SceneState._measure_width(s) == 40.0
+        assert SceneState._measure_height(s) == 40.0
 
 
 class TestLayout:
     """Layout evaluation tests."""
 
-    def test_stack_layout(self):
+    def test_stack_layout(self, interp):
         """Vertical stack layout."""
-        state = Interpreter().eval("""
+        state = interp.eval("""
 canvas massive
 stack gap 10 at 20,20
     rect 80x40
@@ -363,9 +275,9 @@ stack gap 10 at 20,20
         assert '<svg' in svg
         assert svg.count('<rect') >= 3
 
-    def test_row_layout(self):
+    def test_row_layout(self, interp):
         """Horizontal row layout."""
-        state = Interpreter().eval("""
+        state = interp.eval("""
 canvas massive
 row gap 10 at 20,20
     circle r20
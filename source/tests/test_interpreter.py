@@ -1,171 +1,175 @@
 """Comprehensive tests for the DSL interpreter with snapshot testing."""
 
 import pytest
-from hypothesis import given, strategies as st, assume, settings
+from hypothesis import Phase, given, strategies as st, settings
 from pathlib import Path
 import json
+import os
+import difflib
+import xml.etree.ElementTree as ET
 
-from lang import Interpreter
+from lang.eval import _parse
 
 
 class TestInterpreterBasics:
     """Basic interpreter functionality tests."""
 
-    def test_empty_source(self):
-        state = Interpreter().eval("")
+    def test_empty_source(self, interp):
+        state = interp.eval("")
         assert state.canvas.size == "medium"
         assert state.canvas.width == 64
         assert state.canvas.height == 64
 
-    def test_canvas_only(self):
-        state = Interpreter().eval("canvas massive fill #1a1a2e")
+    def test_canvas_only(self, interp):
+        state = interp.eval("canvas massive fill #1a1a2e")
         assert state.canvas.size == "massive"
         assert state.canvas.width == 256
         assert state.canvas.height == 256
         assert state.canvas.fill == "#1a1a2e"
 
-    def test_single_rect(self):
+    def test_single_rect(self, interp):
         source = """canvas massive
 rect at 10,10 size 100x50
   fill #f00"""
-        state = Interpreter().eval(source)
+        state = interp.eval(source)
         assert len(state.shapes) == 1
         assert state.shapes[0]['kind'] == 'rect'
-        assert list(state.shapes[0]['props']['at']) == [10.0, 10.0]
-        assert list(state.shapes[0]['props']['size']) == [100.0, 50.0]
+        assert state.shapes[0]['props']['at'] == (10.0, 10.0)
+        assert state.shapes[0]['props']['size'] == (100.0, 50.0)
+
+
+# (source, expected kind, extra check on the evaluated shape dict)
+_SHAPE_CASES = {
+    "circle": ("circle at 100,100 radius 50\n  fill #0f0", 'circle',
+               lambda s: s['props']['radius'] == 50),
+    "ellipse": ("ellipse at 100,100 radius 80,40\n  fill #00f", 'ellipse', None),
+    "line": ("line from 0,0 to 100,100\n  stroke #000 2", 'line',
+             lambda s: s['props']['from'] == (0.0, 0.0) and s['props']['to'] == (100.0, 100.0)),
+    "path": ('path d "M 0 0 L 100 100 L 100 0 Z"', 'path', None),
+    "polygon": ("polygon points [0,0 100,0 50,100]\n  fill #ff0", 'polygon',
+                lambda s: len(s['props']['points']) == 3),
+    "text": ('text at 10,20 "Hello World"\n  font "Arial" 24\n  fill #000', 'text',
+             lambda s: s['props']['content'] == "Hello World"),
+    "image": ('image at 0,0 size 100x100 href "test.png"', 'image',
+              lambda s: s['props']['href'] == "test.png"),
+}
+
+# (rect modifier lines, section of the shape dict, expected entries)
+_STYLE_CASES = {
+    "fill_stroke": ("  fill #f00\n  stroke #000 2", 'style', {'fill': '#f00', 'stroke': '#000', 'stroke_width': 2}),
+    "opacity": ("  opacity 0.5", 'style', {'opacity': 0.5}),
+    "corner": ("  corner 10", 'style', {'corner': 10}),
+}
+
+_TRANSFORM_CASES = {
+    "rotate": ("  rotate 45", 'transform', {'rotate': 45}),
+    "scale": ("  scale 1.5,2.0", 'transform', {'scale': (1.5, 2.0)}),
+    "translate": ("  translate 10,20", 'transform', {'translate': (10.0, 20.0)}),
+}
+
+
+# Format-echo properties: no interesting shrinks or replays, so generate a fixed, seeded set
+# of examples only (capped by the active profile)
+_PBT = settings(max_examples=min(25, settings().max_examples), deadline=None, database=None,
+                derandomize=True, print_blob=False, phases=[Phase.explicit, Phase.generate])
+
+# Per-example sources: fixed %-templates, filled with one format call each
+_CANVAS_TMPL = "canvas %s"
+_FILL_TMPL = "rect at 0,0 size 50x50\n  fill %s"
+
+# Built once at import and shared by every example
+_HEX_COLOR = st.integers(0, 0xFFFFFF).map(lambda n: f"#{n:06x}")  # int-backed: no regex machinery per draw
+_CANVAS_PX = {'nano': 16, 'micro': 24, 'tiny': 32, 'small': 48, 'medium': 64, 'large': 96,
+              'xlarge': 128, 'huge': 192, 'massive': 256, 'giant': 512}
+_CANVAS_SIZE = st.sampled_from(list(_CANVAS_PX))
+
+
+def _svg_elements(svg: str) -> dict[str, list[dict]]:
+    """Parse SVG once; map each local tag name to its elements' attributes in document order.
+
+    The canvas background is always the first 'rect'.
+    """
+    elements: dict[str, list[dict]] = {}
+    for el in ET.fromstring(svg).iter():
+        elements.setdefault(el.tag.rpartition('}')[2], []).append(el.attrib)
+    return elements
+
+
+def _shape_ast(source: str, **props) -> dict:
+    """Parse a one-shape template once (memoized) and return a scene AST with props overridden."""
+    shape = _parse(source)[0]['Scene'][-1]['Shape']
+    return {'Scene': [{'Shape': {**shape, 'props': {**shape['props'], **props}}}]}
+
+
+def _shape(interp, source: str, idx: int = 0) -> dict:
+    """Evaluate source and return its idx-th shape dict."""
+    return interp.eval(source).shapes[idx]
+
+
+def _assert_modifiers(interp, modifiers: str, section: str, expected: dict):
+    """Evaluate a rect with modifier lines and compare the resulting entries."""
+    shape = _shape(interp, f"rect at 0,0 size 100x100\n{modifiers}")
+    for key, value in expected.items():
+        assert shape[section][key] == value
 
 
 class TestInterpreterShapes:
     """Shape rendering tests."""
 
-    def test_circle(self):
-        source = """circle at 100,100 radius 50
-  fill #0f0"""
-        state = Interpreter().eval(source)
-        assert state.shapes[0]['kind'] == 'circle'
-        assert state.shapes[0]['props']['radius'] == 50
-
-    def test_ellipse(self):
-        source = """ellipse at 100,100 radius 80,40
-  fill #00f"""
-        state = Interpreter().eval(source)
-        assert state.shapes[0]['kind'] == 'ellipse'
-
-    def test_line(self):
-        source = """line from 0,0 to 100,100
-  stroke #000 2"""
-        state = Interpreter().eval(source)
-        assert state.shapes[0]['kind'] == 'line'
-        assert list(state.shapes[0]['props']['from']) == [0.0, 0.0]
-        assert list(state.shapes[0]['props']['to']) == [100.0, 100.0]
-
-    def test_path(self):
-        source = 'path d "M 0 0 L 100 100 L 100 0 Z"'
-        state = Interpreter().eval(source)
-        assert state.shapes[0]['kind'] == 'path'
-
-    def test_polygon(self):
-        source = """polygon points [0,0 100,0 50,100]
-  fill #ff0"""
-        state = Interpreter().eval(source)
-        assert state.shapes[0]['kind'] == 'polygon'
-        assert len(state.shapes[0]['props']['points']) == 3
-
-    def test_text(self):
-        source = '''text at 10,20 "Hello World"
-  font "Arial" 24
-  fill #000'''
-        state = Interpreter().eval(source)
-        assert state.shapes[0]['kind'] == 'text'
-        assert state.shapes[0]['props']['content'] == "Hello World"
-
-    def test_image(self):
-        source = 'image at 0,0 size 100x100 href "test.png"'
-        state = Interpreter().eval(source)
-        assert state.shapes[0]['kind'] == 'image'
-        assert state.shapes[0]['props']['href'] == "test.png"
+    @pytest.mark.parametrize("source,kind,check", list(_SHAPE_CASES.values()), ids=list(_SHAPE_CASES))
+    def test_shape(self, interp, source, kind, check):
+        shape = _shape(interp, source)
+        assert shape['kind'] == kind
+        if check:
+            assert check(shape)
 
 
 class TestInterpreterStyles:
     """Style rendering tests."""
 
-    def test_fill_stroke(self):
-        source = """rect at 0,0 size 100x100
-  fill #f00
-  stroke #000 2"""
-        state = Interpreter().eval(source)
-        style = state.shapes[0]['style']
-        assert style['fill'] == '#f00'
-        assert style['stroke'] == '#000'
-        assert style['stroke_width'] == 2
-
-    def test_opacity(self):
-        source = """rect at 0,0 size 100x100
-  opacity 0.5"""
-        state = Interpreter().eval(source)
-        assert state.shapes[0]['style']['opacity'] == 0.5
-
-    def test_corner(self):
-        source = """rect at 0,0 size 100x100
-  corner 10"""
-        state = Interpreter().eval(source)
-        assert state.shapes[0]['style']['corner'] == 10
+    @pytest.mark.parametrize("modifiers,section,expected", list(_STYLE_CASES.values()), ids=list(_STYLE_CASES))
+    def test_style(self, interp, modifiers, section, expected):
+        _assert_modifiers(interp, modifiers, section, expected)
 
 
 class TestInterpreterTransforms:
     """Transform rendering tests."""
 
-    def test_rotate(self):
-        source = """rect at 50,50 size 100x100
-  rotate 45"""
-        state = Interpreter().eval(source)
-        assert state.shapes[0]['transform']['rotate'] == 45
-
-    def test_scale(self):
-        source = """rect at 0,0 size 100x100
-  scale 1.5,2.0"""
-        state = Interpreter().eval(source)
-        assert list(state.shapes[0]['transform']['scale']) == [1.5, 2.0]
-
-    def test_translate(self):
-        source = """rect at 0,0 size 100x100
-  translate 10,20"""
-        state = Interpreter().eval(source)
-        assert list(state.shapes[0]['transform']['translate']) == [10.0, 20.0]
+    @pytest.mark.parametrize("modifiers,section,expected", list(_TRANSFORM_CASES.values()), ids=list(_TRANSFORM_CASES))
+    def test_transform(self, interp, modifiers, section, expected):
+        _assert_modifiers(interp, modifiers, section, expected)
 
 
 class TestInterpreterGradients:
     """Gradient rendering tests."""
 
-    def test_linear_gradient(self):
+    def test_linear_gradient(self, interp):
         source = """rect at 0,0 size 100x100
   gradient linear #f00 #00f"""
-        state = Interpreter().eval(source)
-        assert state.shapes[0]['style']['gradient'] is not None
-        assert state.shapes[0]['style']['gradient']['gtype'] == 'linear'
+        gradient = _shape(interp, source)['style']['gradient']
+        assert gradient is not None
+        assert gradient['gtype'] == 'linear'
 
-    def test_radial_gradient(self):
+    def test_radial_gradient(self, interp):
         source = """rect at 0,0 size 100x100
   gradient radial #fff #000"""
-        state = Interpreter().eval(source)
-        assert state.shapes[0]['style']['gradient']['gtype'] == 'radial'
+        assert _shape(interp, source)['style']['gradient']['gtype'] == 'radial'
 
 
 class TestInterpreterVariables:
     """Variable resolution tests."""
 
-    def test_color_variable(self):
+    def test_color_variable(self, interp):
         source = """$primary = #e94560
 rect at 0,0 size 100x100 $primary"""
-        state = Interpreter().eval(source)
-        assert state.shapes[0]['style']['fill'] == '#e94560'
+        assert _shape(interp, source)['style']['fill'] == '#e94560'
 
-    def test_multiple_variables(self):
+    def test_multiple_variables(self, interp):
         source = """$primary = #e94560
 $secondary = #16213e
 rect at 0,0 size 100x100 $primary
 circle at 200,200 radius 50 $secondary"""
-        state = Interpreter().eval(source)
+        state = interp.eval(source)
         assert state.shapes[0]['style']['fill'] == '#e94560'
         # Note: circle uses $secondary in props.fill
         assert state.shapes[1]['props'].get('fill') == '#16213e'
@@ -174,110 +178,95 @@ circle at 200,200 radius 50 $secondary"""
 class TestInterpreterLayouts:
     """Layout rendering tests."""
 
-    def test_stack_layout(self):
+    def test_stack_layout(self, interp):
         source = """stack at 0,0 gap 10
   rect size 50x30
   rect size 50x30
   rect size 50x30"""
-        state = Interpreter().eval(source)
+        state = interp.eval(source)
         assert len(state.shapes) == 1
         assert state.shapes[0]['kind'] == 'layout'
         assert len(state.shapes[0].get('children', [])) == 3
 
-    def test_row_layout(self):
+    def test_row_layout(self, interp):
         source = """row at 0,0 gap 10
   rect size 30x50
   rect size 30x50"""
-        state = Interpreter().eval(source)
-        assert state.shapes[0]['props']['direction'] == 'horizontal'
+        assert _shape(interp, source)['props']['direction'] == 'horizontal'
 
 
 class TestInterpreterSVGOutput:
     """SVG output tests."""
 
-    def test_svg_contains_xmlns(self):
-        state = Interpreter().eval("canvas large")
+    def test_svg_contains_xmlns(self, interp):
+        state = interp.eval("canvas large")
         svg = state.to_svg()
         assert 'xmlns="http://www.w3.org/2000/svg"' in svg
 
-    def test_svg_contains_dimensions(self):
-        state = Interpreter().eval("canvas massive")
-        svg = state.to_svg()
-        assert 'width="256"' in svg
-        assert 'height="256"' in svg
+    def test_svg_contains_dimensions(self, interp):
+        svg = _svg_elements(interp.eval("canvas massive").to_svg())['svg'][0]
+        assert (svg['width'], svg['height']) == ('256', '256')
 
-    def test_svg_contains_background(self):
-        state = Interpreter().eval("canvas large fill #1a1a2e")
-        svg = state.to_svg()
-        assert 'fill="#1a1a2e"' in svg
+    def test_svg_contains_background(self, interp):
+        background = _svg_elements(interp.eval("canvas large fill #1a1a2e").to_svg())['rect'][0]
+        assert background['fill'] == '#1a1a2e'
 
-    def test_svg_contains_rect(self):
+    def test_svg_contains_rect(self, interp):
         source = """canvas large
 rect at 10,10 size 50x30
   fill #f00"""
-        state = Interpreter().eval(source)
-        svg = state.to_svg()
-        assert '<rect' in svg
-        assert 'x="10"' in svg
-        assert 'fill="#f00"' in svg
+        rect = _svg_elements(interp.eval(source).to_svg())['rect'][-1]
+        assert rect['x'] == '10'
+        assert rect['fill'] == '#f00'
 
-    def test_svg_contains_circle(self):
+    def test_svg_contains_circle(self, interp):
         source = """canvas large
 circle at 50,50 radius 20
   fill #0f0"""
-        state = Interpreter().eval(source)
-        svg = state.to_svg()
-        assert '<circle' in svg
-        assert 'r="20"' in svg
+        circles = _svg_elements(interp.eval(source).to_svg())['circle']
+        assert circles[0]['r'] == '20'
 
-    def test_svg_gradient_defs(self):
+    def test_svg_gradient_defs(self, interp):
         source = """canvas large
 rect at 0,0 size 100x100
   gradient linear #f00 #00f"""
-        state = Interpreter().eval(source)
-        svg = state.to_svg()
-        assert '<defs>' in svg
-        assert '<linearGradient' in svg
-        assert '</defs>' in svg
+        # Parsing succeeds only if <defs> is closed
+        elements = _svg_elements(interp.eval(source).to_svg())
+        assert 'defs' in elements
+        assert 'linearGradient' in elements
 
 
 class TestInterpreterErrors:
     """Error handling tests."""
 
-    def test_error_collection(self):
+    def test_error_collection(self, interp):
         source = "unknown_command"
-        state = Interpreter().eval(source)
+        state = interp.eval(source)
         assert len(state.error_infos) > 0
 
-    def test_undefined_variable_uses_literal(self):
+    def test_undefined_variable_uses_literal(self, interp):
         # Undefined variables are passed through as literal strings with $VAR: prefix
-        source = "rect $undefined"
-        state = Interpreter().eval(source)
-        # The variable name is prefixed with $VAR: when undefined
-        assert state.shapes[0]['props'].get('fill') == '$VAR:$undefined'
+        assert _shape(interp, "rect $undefined")['props'].get('fill') == '$VAR:$undefined'
 
 
+@pytest.mark.slow
 class TestInterpreterPropertyBased:
     """Property-based tests using hypothesis."""
 
-    @given(st.sampled_from(['nano', 'micro', 'tiny', 'small', 'medium', 'large', 'xlarge', 'huge', 'massive', 'giant']))
-    def test_canvas_dimensions_in_svg(self, size):
+    @given(_CANVAS_SIZE)
+    @_PBT
+    def test_canvas_dimensions_in_svg(self, interp, size):
         """Canvas dimensions should match standard sizes in SVG output."""
-        sizes = {'nano': 16, 'micro': 24, 'tiny': 32, 'small': 48, 'medium': 64, 'large': 96, 'xlarge': 128, 'huge': 192, 'massive': 256, 'giant': 512}
-        state = Interpreter().eval(f"canvas {size}")
-        svg = state.to_svg()
-        expected = sizes[size]
-        assert f'width="{expected}"' in svg
-        assert f'height="{expected}"' in svg
+        svg = _svg_elements(interp.eval(_CANVAS_TMPL % size).to_svg())['svg'][0]
+        expected = str(_CANVAS_PX[size])
+        assert (svg['width'], svg['height']) == (expected, expected)
 
-    @given(st.from_regex(r'#[0-9a-fA-F]{6}', fullmatch=True))
-    def test_fill_color_in_svg(self, color):
+    @given(_HEX_COLOR)
+    @_PBT
+    def test_fill_color_in_svg(self, interp, color):
         """Fill colors should appear in SVG output."""
-        source = f"""rect at 0,0 size 50x50
-  fill {color}"""
-        state = Interpreter().eval(source)
-        svg = state.to_svg()
-        assert color.lower() in svg.lower()
+        rect = _svg_elements(interp.eval(_FILL_TMPL % color).to_svg())['rect'][-1]
+        assert rect['fill'].lower() == color.lower()
 
     @given(
         st.integers(min_value=0, max_value=500),
@@ -285,82 +274,73 @@ class TestInterpreterPropertyBased:
         st.integers(min_value=1, max_value=200),
         st.integers(min_value=1, max_value=200)
     )
-    def test_rect_coords_in_svg(self, x, y, w, h):
+    @_PBT
+    def test_rect_coords_in_svg(self, eval_ast, x, y, w, h):
         """Rect coordinates should appear in SVG output."""
-        source = f"""rect at {x},{y} size {w}x{h}
-  fill #f00"""
-        state = Interpreter().eval(source)
-        svg = state.to_svg()
-        assert f'x="{x}"' in svg
-        assert f'y="{y}"' in svg
+        state = eval_ast(_shape_ast("rect at 0,0 size 1x1\n  fill #f00", at=(x, y), size=(w, h)))
+        rect = _svg_elements(state.to_svg())['rect'][-1]
+        assert (rect['x'], rect['y']) == (str(x), str(y))
 
     @given(
         st.integers(min_value=0, max_value=500),
         st.integers(min_value=0, max_value=500),
         st.integers(min_value=1, max_value=100)
     )
-    def test_circle_coords_in_svg(self, cx, cy, r):
+    @_PBT
+    def test_circle_coords_in_svg(self, eval_ast, cx, cy, r):
         """Circle coordinates should appear in SVG output."""
-        source = f"""circle at {cx},{cy} radius {r}
-  fill #0f0"""
-        state = Interpreter().eval(source)
-        svg = state.to_svg()
-        assert f'cx="{cx}"' in svg or f'cx="{float(cx)}"' in svg
-        assert f'r="{r}"' in svg or f'r="{float(r)}"' in svg
-
-
-class TestInterpreterSnapshots:
-    """Snapshot tests for SVG output."""
-
-    def _compare_or_write_snapshot(self, snapshot_dir: Path, name: str, svg: str):
-        """Compare SVG to snapshot or write new snapshot."""
-        snapshot_file = snapshot_dir / f"{name}.svg"
-        if snapshot_file.exists():
-            expected = snapshot_file.read_text()
-            assert svg == expected, f"Snapshot mismatch for {name}"
-        else:
-            snapshot_file.write_text(svg)
+        state = eval_ast(_shape_ast("circle at 0,0 radius 1\n  fill #0f0", at=(cx, cy), radius=r))
+        circle = _svg_elements(state.to_svg())['circle'][0]
+        # Allow for float formatting
+        assert float(circle['cx']) == cx
+        assert float(circle['r']) == r
 
-    def test_snapshot_empty_canvas(self, snapshot_dir):
-        state = Interpreter().eval("canvas large fill #fff")
-        svg = state.to_svg()
-        self._compare_or_write_snapshot(snapshot_dir, "empty_canvas", svg)
 
-    def test_snapshot_basic_rect(self, snapshot_dir):
-        source = """canvas huge fill #fff
+# (snapshot name, source) - each renders to tests/snapshots/<name>.svg
+SNAPSHOTS = [
+    ("empty_canvas", "canvas large fill #fff"),
+    ("basic_rect", """canvas huge fill #fff
 rect at 25,25 size 150x150
   fill #e94560
-  corner 10"""
-        state = Interpreter().eval(source)
-        svg = state.to_svg()
-        self._compare_or_write_snapshot(snapshot_dir, "basic_rect", svg)
-
-    def test_snapshot_basic_circle(self, snapshot_dir):
-        source = """canvas huge fill #1a1a2e
+  corner 10"""),
+    ("basic_circle", """canvas huge fill #1a1a2e
 circle at 100,100 radius 50
   fill #e94560
-  stroke #fff 2"""
-        state = Interpreter().eval(source)
-        svg = state.to_svg()
-        self._compare_or_write_snapshot(snapshot_dir, "basic_circle", svg)
-
-    def test_snapshot_gradient(self, snapshot_dir):
-        source = """canvas huge fill #fff
+  stroke #fff 2"""),
+    ("gradient", """canvas huge fill #fff
 rect at 25,25 size 150x150
-  gradient linear #e94560 #16213e"""
-        state = Interpreter().eval(source)
-        svg = state.to_svg()
-        self._compare_or_write_snapshot(snapshot_dir, "gradient", svg)
-
-    def test_snapshot_multiple_shapes(self, snapshot_dir):
-        source = """canvas massive fill #1a1a2e
+  gradient linear #e94560 #16213e"""),
+    ("multiple_shapes", """canvas massive fill #1a1a2e
 rect at 20,20 size 80x60
   fill #e94560
 circle at 200,50 radius 30
   fill #16213e
 text at 50,150 "Hello"
-  fill #fff"""
-        state = Interpreter().eval(source)
-        svg = state.to_svg()
-        self._compare_or_write_snapshot(snapshot_dir, "multiple_shapes", svg)
+  fill #fff"""),
+]
 
+
+class TestInterpreterSnapshots:
+    """Snapshot tests for SVG output."""
+
+    def _compare_or_write_snapshot(self, snapshots: dict, snapshot_dir: Path, name: str, svg: str):
+        """Compare SVG to the preloaded snapshot or write new snapshot."""
+        data = svg.encode()
+        expected = snapshots.get(name)
+        if expected is not None:
+            if data != expected:
+                diff = difflib.unified_diff(expected.decode().splitlines(), svg.splitlines(),
+                                            "snapshot", "rendered", lineterm="")
+                pytest.fail(f"Snapshot mismatch for {name}:\n" + "\n".join(diff))
+        else:
+            # Write-then-rename so parallel workers never observe a partial snapshot
+            snapshot_file = snapshot_dir / f"{name}.svg"
+            tmp = snapshot_file.with_suffix(f".svg.{os.getpid()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, snapshot_file)
+            snapshots[name] = data
+
+    @pytest.mark.parametrize("name,source", SNAPSHOTS, ids=[name for name, _ in SNAPSHOTS])
+    def test_snapshot(self, interp, snapshots, snapshot_dir, name, source):
+        svg = interp.eval(source).to_svg()
+        self._compare_or_write_snapshot(snapshots, snapshot_dir, name, svg)
@@ -1,90 +1,159 @@
 """Tests for DSL interpreter using Rust core."""
 
+import json
+import random
+import string
 import pytest
+from functools import lru_cache
+from pathlib import Path
 import iconoglott_core as rust
 from lang.eval import Interpreter
 
 
+# Frozen parse_py output per source; JSON has no tuples, so pairs are stored as lists
+GOLDEN_DIR = Path(__file__).parent / "golden_asts"
+
+_GOLDEN_SOURCES = {
+    "canvas": "canvas giant fill #000",
+    "shape_at": "rect at 100,200 size 50x30",
+    "variable": "$color = #f00\nrect $color",  # Variable node first, then the shape with fill resolved
+    "nested_style": "rect at 10,10 size 100x50\n  fill #e94560\n  stroke #000 2\n  corner 8",
+}
+
+
+@lru_cache(maxsize=512)
+def _tokens(source: str) -> tuple:
+    """Tokenize once per distinct source; rust.Parser copies tokens, so sharing is safe."""
+    return tuple(rust.Lexer(source).py_tokenize())
+
+
+_SIZE_NAMES = {"nano", "micro", "tiny", "small", "medium", "large", "xlarge", "xl", "huge", "massive", "giant"}
+
+
+def _lex_batch(seed: int, n: int = 1000) -> tuple[str, list]:
+    """Build n one-value lines (number, pair, ident or color) and their expected (type, value)."""
+    rng = random.Random(seed)
+    T = rust.TokenType
+    lines, expected = [], []
+    for _ in range(n):
+        kind = rng.randrange(4)
+        if kind == 0:
+            v = rng.randint(-10000, 10000)
+            lines.append(str(v))
+            expected.append((T.Number, float(v)))
+        elif kind == 1:
+            x, y = rng.randint(0, 1000), rng.randint(0, 1000)
+            lines.append(f"{x},{y}")
+            expected.append((T.Pair, (float(x), float(y))))
+        elif kind == 2:
+            ident = rng.choice(string.ascii_letters + "_") + "".join(
+                rng.choices(string.ascii_letters + string.digits + "_", k=rng.randrange(12)))
+            if ident in _SIZE_NAMES:
+                ident += "_"
+            lines.append(ident)
+            expected.append((T.Ident, ident))
+        else:
+            color = "#" + "".join(rng.choices("0123456789abcdefABCDEF", k=rng.choice((3, 6))))
+            lines.append(color)
+            expected.append((T.Color, color))
+    return "\n".join(lines), expected
+
+
+# Non-integral floats drawn once at import: (source text, expected value)
+_rng = random.Random(0)
+_FLOAT_CASES = [
+    (repr(v), v) for v in (round(_rng.uniform(-1000, 1000), 3) for _ in range(1000))
+    if not v.is_integer() and "e" not in repr(v)
+]
+_PAIR_CASES = [(_rng.randrange(1000), _rng.randrange(1000)) for _ in range(500)]
+del _rng
+
+_T = rust.TokenType
+# (source, leading (type, value) tokens) - a None value is not checked
+_LEX_CASES = {
+    "canvas": ("canvas giant", [(_T.Ident, "canvas"), (_T.Size, "giant")]),
+    "color": ("fill #ff0000", [(_T.Ident, "fill"), (_T.Color, "#ff0000")]),
+    "variable": ("$primary = #e94560", [(_T.Var, "$primary"), (_T.Equals, None), (_T.Color, "#e94560")]),
+    "pair": ("at 100,200", [(_T.Ident, "at"), (_T.Pair, (100.0, 200.0))]),
+    "string": ('text "Hello World"', [(_T.Ident, "text"), (_T.String, "Hello World")]),
+    # Every punctuation kind and color length in one line
+    "punctuation": ("= : -> [ ] #fff #e94560 #00000080", [
+        (_T.Equals, None), (_T.Colon, None), (_T.Arrow, None), (_T.LBracket, None), (_T.RBracket, None),
+        (_T.Color, "#fff"), (_T.Color, "#e94560"), (_T.Color, "#00000080"), (_T.Newline, None), (_T.Eof, None),
+    ]),
+}
+
+# (scene source, top-level node kinds in order: shapes by kind, other nodes by variant)
+_SCENES = {
+    "shapes": ("canvas giant\nrect at 0,0 size 10x10\ncircle at 5,5 radius 3\nellipse at 9,9 radius 4,2",
+               ["Canvas", "rect", "circle", "ellipse"]),
+    "styled": ("rect at 0,0 size 10x10\n  fill #f00\n  stroke #000 1\nline from 0,0 to 9,9\n  stroke #00f 2",
+               ["rect", "line"]),
+    "variables": ("$a = #f00\n$b = #0f0\nrect $a\ncircle at 5,5 radius 3\n  fill $b",
+                  ["Variable", "Variable", "rect", "circle"]),
+}
+
+
 class TestLexer:
     """Test Rust lexer via Python bindings."""
     
-    def test_tokenize_canvas(self):
-        lexer = rust.Lexer("canvas giant")
-        tokens = lexer.py_tokenize()
-        assert tokens[0].ttype == rust.TokenType.Ident
-        assert tokens[0].value == "canvas"
-        assert tokens[1].ttype == rust.TokenType.Size
-        assert tokens[1].value == "giant"
-
-    def test_tokenize_color(self):
-        lexer = rust.Lexer("fill #ff0000")
-        tokens = lexer.py_tokenize()
-        assert tokens[1].ttype == rust.TokenType.Color
-        assert tokens[1].value == "#ff0000"
-
-    def test_tokenize_variable(self):
-        lexer = rust.Lexer("$primary = #e94560")
-        tokens = lexer.py_tokenize()
-        assert tokens[0].ttype == rust.TokenType.Var
-        assert tokens[0].value == "$primary"
-        assert tokens[1].ttype == rust.TokenType.Equals
-
-    def test_tokenize_pair(self):
-        lexer = rust.Lexer("at 100,200")
-        tokens = lexer.py_tokenize()
-        assert tokens[1].ttype == rust.TokenType.Pair
-        assert tokens[1].value == (100.0, 200.0)
-
-    def test_tokenize_string(self):
-        lexer = rust.Lexer('text "Hello World"')
-        tokens = lexer.py_tokenize()
-        assert tokens[1].ttype == rust.TokenType.String
-        assert tokens[1].value == "Hello World"
+    @pytest.mark.parametrize("source,expected", list(_LEX_CASES.values()), ids=list(_LEX_CASES))
+    def test_tokenize(self, source, expected):
+        """Leading tokens carry the expected type and, where given, value."""
+        tokens = _tokens(source)
+        assert len(tokens) >= len(expected)
+        for tok, (ttype, value) in zip(tokens, expected):
+            assert tok.ttype == ttype
+            if value is not None:
+                assert tok.value == value
+
+    @pytest.mark.parametrize("seed", range(3))
+    def test_tokenize_batch(self, seed):
+        """A thousand literals lexed in one pass keep their types and values."""
+        source, expected = _lex_batch(seed)
+        skip = (rust.TokenType.Newline, rust.TokenType.Eof)
+        got = [(t.ttype, t.value) for t in _tokens(source) if t.ttype not in skip]
+        assert got == expected
+
+    def test_tokenize_floats(self):
+        """Decimal literals lex to Number tokens with their exact value."""
+        source = "\n".join(text for text, _ in _FLOAT_CASES)
+        nums = [(t.ttype, t.value) for t in _tokens(source) if t.ttype == rust.TokenType.Number]
+        assert nums == [(rust.TokenType.Number, v) for _, v in _FLOAT_CASES]
+
+    def test_tokenize_pairs(self):
+        """Coordinate pairs lex to Pair tokens in source order."""
+        source = "\n".join(f"{x},{y}" for x, y in _PAIR_CASES)
+        pairs = [t.value for t in _tokens(source) if t.ttype == rust.TokenType.Pair]
+        assert pairs == [(float(x), float(y)) for x, y in _PAIR_CASES]
+
+    def test_tokenize_indent_levels(self):
+        """Nested blocks emit balanced Indent/Dedent tokens, counted in one pass."""
+        indent = dedent = 0
+        for t in _tokens("stack\n  rect 10x10\n    fill #f00\n  circle r5\nrect 5x5"):
+            indent += t.ttype == _T.Indent
+            dedent += t.ttype == _T.Dedent
+        assert (indent, dedent) == (2, 2)
 
 
 class TestParser:
     """Test Rust parser via Python bindings."""
     
     def _parse(self, source: str):
-        lexer = rust.Lexer(source)
-        tokens = lexer.py_tokenize()
-        parser = rust.Parser(tokens)
-        return parser.parse_py()
+        return rust.Parser(list(_tokens(source))).parse_py()
     
-    def test_parse_canvas(self):
-        ast = self._parse("canvas giant fill #000")
-        canvas = ast['Scene'][0]['Canvas']
-        assert canvas['size'] == 'giant'
-        assert canvas['width'] == 512
-        assert canvas['height'] == 512
-        assert canvas['fill'] == "#000"
-
-    def test_parse_shape_at(self):
-        ast = self._parse("rect at 100,200 size 50x30")
-        shape = ast['Scene'][0]['Shape']
-        assert shape['kind'] == "rect"
-        assert shape['props']['at'] == (100.0, 200.0)
-        assert shape['props']['size'] == (50.0, 30.0)
-
-    def test_parse_variable(self):
-        ast = self._parse("$color = #f00\nrect $color")
-        # Variable should be in first child
-        assert 'Variable' in ast['Scene'][0]
-        # Shape should have fill resolved
-        shape = ast['Scene'][1]['Shape']
-        assert shape['props']['fill'] == "#f00"
-
-    def test_parse_nested_style(self):
-        source = """rect at 10,10 size 100x50
-  fill #e94560
-  stroke #000 2
-  corner 8"""
-        ast = self._parse(source)
-        shape = ast['Scene'][0]['Shape']
-        assert shape['style']['fill'] == "#e94560"
-        assert shape['style']['stroke'] == "#000"
-        assert shape['style']['stroke_width'] == 2.0
-        assert shape['style']['corner'] == 8.0
+    @pytest.mark.parametrize("name", list(_GOLDEN_SOURCES))
+    def test_parse_golden(self, name):
+        expected = json.loads((GOLDEN_DIR / f"{name}.json").read_text())
+        got = json.loads(json.dumps(self._parse(_GOLDEN_SOURCES[name])))  # tuples -> lists
+        assert got == expected
+
+    @pytest.mark.parametrize("source,kinds", list(_SCENES.values()), ids=list(_SCENES))
+    def test_parse_scene(self, source, kinds):
+        """Multi-node scenes keep every top-level node, in source order."""
+        nodes = self._parse(source)["Scene"]
+        got = [node["Shape"]["kind"] if "Shape" in node else next(iter(node)) for node in nodes]
+        assert got == kinds
 
 
 class TestInterpreter:
@@ -133,4 +202,4 @@ rect at 10,10 size 100x50
         state = Interpreter().eval(source)
         assert state.shapes[0]['transform']['rotate'] == 45.0
         scale = state.shapes[0]['transform']['scale']
-        assert list(scale) == [1.5, 1.5]
+        assert scale == (1.5, 1.5)
@@ -1,21 +1,61 @@
 """Tests for WebSocket server."""
 
+import orjson
 import pytest
 from fastapi.testclient import TestClient
-from server.app import app
+from server.app import STATIC_DIR
 
 
+@pytest.fixture(scope="module")
+def client():
+    """One client for the module; the app is built here, and lifespan startup/shutdown runs once."""
+    from server.app import create_app
+    with TestClient(create_app()) as c:
+        yield c
+
+
+# One worker runs the whole class, so the module client and the shared render cache are set up once
+@pytest.mark.xdist_group("server")
 class TestServer:
-    def test_index(self):
-        client = TestClient(app)
+    def test_index(self, client):
         resp = client.get("/")
         assert resp.status_code == 200
 
-    def test_websocket_render(self):
-        client = TestClient(app)
+    @pytest.mark.skipif(not (STATIC_DIR / "index.html").is_file(), reason="playground not built")
+    def test_index_etag_not_modified(self, client):
+        etag = client.get("/").headers["etag"]
+        resp = client.get("/", headers={"If-None-Match": etag})
+        assert resp.status_code == 304
+
+    def test_websocket_render(self, client):
         with client.websocket_connect("/ws") as ws:
             ws.send_json({"type": "source", "payload": "canvas 100 100"})
-            msg = ws.receive_json()
+            msg = ws.receive_json(mode="binary")
             assert msg["type"] == "render"
             assert "<svg" in msg["svg"]
 
+    def test_websocket_repeat_source_reuses_frame(self, client, monkeypatch):
+        from server.ws import manager
+        offload, calls = manager._offload, []
+
+        async def counting_offload(source):
+            calls.append(source)
+            return await offload(source)
+
+        monkeypatch.setattr(manager, "_offload", counting_offload)
+        source = "canvas nano fill #123456"
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "source", "payload": source})
+            first = ws.receive_bytes()
+            ws.send_json({"type": "source", "payload": source})
+            assert ws.receive_bytes() == first
+        assert calls == [source]  # Second frame came from the cache
+        assert orjson.loads(first)["errors"] == []
+
+    def test_websocket_unknown_message_type(self, client):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "bogus"})
+            msg = ws.receive_json(mode="binary")
+            assert msg["type"] == "error"
+            assert msg["message"] == "Unknown message type: bogus"
+            assert msg["errors"][0]["message"] == msg["message"]